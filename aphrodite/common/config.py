@@ -99,7 +99,7 @@ class ModelConfig:
         self.tokenizer_mode = tokenizer_mode
 
     def _verify_quantization(self) -> None:
-        supported_quantization = ["awq", "gptq"]
+        supported_quantization = ["awq", "gptq", "smoothquant"]
         if hasattr(self.hf_config, "quantization_config"
                    ) and self.hf_config.quantization_config.get(
                        "quant_method") == QuantizationMethod.GPTQ:
@@ -171,6 +171,9 @@ class CacheConfig:
         gpu_memory_utilization: Fraction of GPU memory to use for the
             Aphrodite execution.
         swap_space: Size of the CPU swap space per GPU (in GiB).
+        cache_dtype: Data type for the KV cache. "auto" uses the model dtype,
+            while "fp8_e4m3" stores the cache in FP8 E4M3, halving its memory
+            footprint at a small accuracy cost.
     """
 
     def __init__(
@@ -178,11 +181,13 @@ class CacheConfig:
         block_size: int,
         gpu_memory_utilization: float,
         swap_space: int,
+        cache_dtype: str = "auto",
         sliding_window: Optional[int] = None,
     ) -> None:
         self.block_size = block_size
         self.gpu_memory_utilization = gpu_memory_utilization
         self.swap_space_bytes = swap_space * _GB
+        self.cache_dtype = cache_dtype
         self.sliding_window = sliding_window
         self._verify_args()
 
@@ -195,6 +200,12 @@ class CacheConfig:
             raise ValueError(
                 "GPU memory utilization must be less than 1.0. Got "
                 f"{self.gpu_memory_utilization}.")
+        if self.cache_dtype not in ["auto", "fp8_e4m3"]:
+            raise ValueError(f"Unknown KV cache dtype: {self.cache_dtype}")
+        if self.cache_dtype == "fp8_e4m3" and self.sliding_window is not None:
+            raise ValueError(
+                "The FP8 E4M3 KV cache is not supported for models with "
+                "sliding window attention.")
 
     def verify_with_parallel_config(
         self,
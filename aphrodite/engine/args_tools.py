@@ -22,6 +22,7 @@ class EngineArgs:
     pipeline_parallel_size: int = 1
     tensor_parallel_size: int = 1
     block_size: int = 16
+    kv_cache_dtype: str = 'auto'
     swap_space: int = 4  # GiB
     gpu_memory_utilization: float = 0.90
     max_num_batched_tokens: Optional[int] = None
@@ -124,6 +125,14 @@ class EngineArgs:
                             default=EngineArgs.block_size,
                             choices=[8, 16, 32],
                             help='token block size')
+        parser.add_argument('--kv-cache-dtype',
+                            type=str,
+                            default=EngineArgs.kv_cache_dtype,
+                            choices=['auto', 'fp8_e4m3'],
+                            help='data type for the KV cache. "auto" uses '
+                            'the model data type. "fp8_e4m3" stores the '
+                            'cache in FP8 E4M3, halving its memory usage. '
+                            'Requires CUDA 11.8 or higher.')
         # TODO: Support fine-grained seeds (e.g., seed per request).
         parser.add_argument('--seed',
                             type=int,
@@ -154,7 +163,7 @@ class EngineArgs:
         parser.add_argument('--quantization',
                             '-q',
                             type=str,
-                            choices=['awq', 'gptq', None],
+                            choices=['awq', 'gptq', 'smoothquant', None],
                             default=None,
                             help='Method used to quantize the weights')
         return parser
@@ -177,8 +186,9 @@ class EngineArgs:
                                    self.max_model_len, self.quantization)
         cache_config = CacheConfig(self.block_size,
                                    self.gpu_memory_utilization,
-                                   self.swap_space, getattr(model_config.hf_config,
-                                                            'sliding_window', None))
+                                   self.swap_space, self.kv_cache_dtype,
+                                   getattr(model_config.hf_config,
+                                           'sliding_window', None))
         parallel_config = ParallelConfig(self.pipeline_parallel_size,
                                          self.tensor_parallel_size,
                                          self.worker_use_ray)
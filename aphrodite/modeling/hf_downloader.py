@@ -259,6 +259,26 @@ def convert_pyslice_to_tensor(x: Any) -> torch.Tensor:
     return x
 
 
+def copy_weight_to_device(
+    param: torch.Tensor,
+    loaded_weight: torch.Tensor,
+) -> None:
+    """Copy a staged checkpoint weight into the (GPU) parameter.
+
+    The staging tensor is moved to pinned memory first so that the H2D copy
+    runs on the copy engine without blocking the CPU, letting the next
+    checkpoint shard be read and routed while the previous one is still in
+    flight. The copies are ordered on the current stream, so GPU consumers
+    need no extra synchronization; callers that touch the weights from the
+    CPU afterwards must call `torch.cuda.synchronize()` once at the end.
+    """
+    if param.is_cuda and not loaded_weight.is_cuda:
+        loaded_weight = loaded_weight.pin_memory()
+        param.copy_(loaded_weight, non_blocking=True)
+    else:
+        param.copy_(loaded_weight)
+
+
 def load_padded_tensor_parallel_vocab(
     param: torch.Tensor,
     loaded_weight: Any,  # `torch.Tensor` or `PySafeSlice`
@@ -269,7 +289,7 @@ def load_padded_tensor_parallel_vocab(
     end_idx = (tensor_model_parallel_rank + 1) * shard_size
     loaded_weight = loaded_weight[start_idx:end_idx]
     loaded_weight = convert_pyslice_to_tensor(loaded_weight)
-    param.data[:loaded_weight.shape[0]].copy_(loaded_weight)
+    copy_weight_to_device(param.data[:loaded_weight.shape[0]], loaded_weight)
 
 
 def load_tensor_parallel_weights(
@@ -304,7 +324,7 @@ def load_tensor_parallel_weights(
     assert param.shape == loaded_weight.shape, (
         f"{param_name} shape mismatch between model and checkpoint: "
         f"{param.shape} != {loaded_weight.shape}")
-    param.data.copy_(loaded_weight)
+    copy_weight_to_device(param.data, loaded_weight)
 
 
 def initialize_dummy_weights(
@@ -14,9 +14,7 @@ from aphrodite import attention_ops
 from aphrodite import cache_ops
 from aphrodite import pos_encoding_ops
 from aphrodite.modeling.metadata import InputMetadata
-from aphrodite.modeling.layers.rotary_embedding import (
-    DynamicNTKScalingRotaryEmbedding, LinearScalingRotaryEmbedding,
-    RotaryEmbedding)
+from aphrodite.modeling.layers.rotary_embedding import get_rope
 
 _SUPPORTED_HEAD_SIZES = [64, 80, 96, 112, 128, 256]
 
@@ -282,23 +280,10 @@ class PagedAttentionWithRoPE(PagedAttention):
     ) -> None:
         super().__init__(num_heads, head_size, scale,
                          num_kv_heads, sliding_window=sliding_window)
-        if rope_scaling is None:
-            self.rotary_emb = RotaryEmbedding(head_size, rotary_dim,
-                                              max_position, base,
-                                              is_neox_style)
-        else:
-            scaling_type = rope_scaling["type"]
-            scaling_factor = rope_scaling["factor"]
-            if scaling_type == "linear":
-                self.rotary_emb = LinearScalingRotaryEmbedding(
-                    head_size, rotary_dim, max_position, base, is_neox_style,
-                    scaling_factor)
-            elif scaling_type == "dynamic":
-                self.rotary_emb = DynamicNTKScalingRotaryEmbedding(
-                    head_size, rotary_dim, max_position, base, is_neox_style,
-                    scaling_factor)
-            else:
-                raise ValueError(f"Unknown RoPE scaling type {scaling_type}")
+        # The rotary embedding module (and thus the cos/sin cache) is shared
+        # across all the attention layers of the model.
+        self.rotary_emb = get_rope(head_size, rotary_dim, max_position, base,
+                                   is_neox_style, rope_scaling)
 
     def forward(
         self,
@@ -329,6 +314,23 @@ class PagedAttentionWithRoPE(PagedAttention):
             shape = [num_tokens, num_heads * head_size]
         """
 
+        if (input_metadata.num_prompt_tokens == 0
+                and input_metadata.num_generation_tokens > 0
+                and key_cache is not None and value_cache is not None
+                and input_metadata.to_cache is None):
+            # Decoding-only run. Use the fused kernel that applies the rotary
+            # embedding and writes the new KV to the cache in a single launch.
+            return self._forward_decode_fused(
+                positions,
+                query,
+                key,
+                value,
+                key_cache,
+                value_cache,
+                input_metadata,
+                cache_event,
+            )
+
         # Apply rotary embedding to the query and key before passing them
         # to the attention op.
         query, key = self.rotary_emb(positions, query, key)
@@ -342,6 +344,98 @@ class PagedAttentionWithRoPE(PagedAttention):
             cache_event,
         )
 
+    def forward_packed(
+        self,
+        positions: torch.Tensor,
+        qkv: torch.Tensor,
+        key_cache: torch.Tensor,
+        value_cache: torch.Tensor,
+        input_metadata: InputMetadata,
+        cache_event: Optional[torch.cuda.Event],
+    ) -> torch.Tensor:
+        """PagedAttention forward pass on a packed QKV tensor.
+
+        Takes the QKV projection output as-is and derives the query, key,
+        and value views here, so that the model code does not have to slice
+        the tensor. At small batch sizes decoding is CPU-bound, and the three
+        per-layer `chunk`/slice calls add up.
+
+        Args:
+            positions: shape = [num_tokens]
+            qkv: shape = [num_tokens, 3 * num_heads * head_size]
+
+        Returns:
+            shape = [num_tokens, num_heads * head_size]
+        """
+        assert self.num_kv_heads == self.num_heads, (
+            "forward_packed requires the query, key, and value to have the "
+            "same number of heads.")
+        # Slice flat 2-D views out of the packed tensor. The kernels accept
+        # the row strides, but the rotary embedding launcher derives the head
+        # count from the 2-D shape, so the views must not be reshaped to
+        # [num_tokens, num_heads, head_size] here.
+        hidden_size = self.num_heads * self.head_size
+        qkv = qkv.view(-1, 3 * hidden_size)
+        return self.forward(
+            positions,
+            qkv[:, :hidden_size],
+            qkv[:, hidden_size:2 * hidden_size],
+            qkv[:, 2 * hidden_size:],
+            key_cache,
+            value_cache,
+            input_metadata,
+            cache_event,
+        )
+
+    def _forward_decode_fused(
+        self,
+        positions: torch.Tensor,
+        query: torch.Tensor,
+        key: torch.Tensor,
+        value: torch.Tensor,
+        key_cache: torch.Tensor,
+        value_cache: torch.Tensor,
+        input_metadata: InputMetadata,
+        cache_event: Optional[torch.cuda.Event],
+    ) -> torch.Tensor:
+        """Fast path for decoding-only runs.
+
+        Fuses the rotary embedding with the KV cache write: the query is
+        rotated in place, while the key is rotated in registers and streamed
+        into the cache together with the value. This replaces three kernel
+        launches (rotary embedding, cache write, and the intermediate key
+        round-trip through HBM) with one.
+        """
+        query = query.view(-1, self.num_heads, self.head_size)
+        key = key.view(-1, self.num_kv_heads, self.head_size)
+        value = value.view(-1, self.num_kv_heads, self.head_size)
+        output = torch.empty_like(query)
+
+        # Wait until the cache op is done.
+        if cache_event is not None:
+            cache_event.wait()
+
+        num_valid_tokens = input_metadata.num_valid_tokens
+        pos_encoding_ops.rotary_embedding_and_cache(
+            positions[:num_valid_tokens],
+            query[:num_valid_tokens],
+            key[:num_valid_tokens],
+            value[:num_valid_tokens],
+            self.rotary_emb.cos_sin_cache,
+            self.rotary_emb.is_neox_style,
+            key_cache,
+            value_cache,
+            input_metadata.slot_mapping,
+        )
+        self.single_query_cached_kv_attention(output[:num_valid_tokens],
+                                              query[:num_valid_tokens],
+                                              key_cache, value_cache,
+                                              input_metadata)
+
+        # Reshape the output tensor.
+        # NOTE: The output tensor may include paddings.
+        return output.view(-1, self.num_heads * self.head_size)
+
 
 class PagedAttentionWithALiBi(PagedAttention):
     """PagedAttention with ALiBi attention bias."""
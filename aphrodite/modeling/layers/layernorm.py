@@ -1,4 +1,6 @@
 """Custom normalization layers"""
+from typing import Optional, Tuple, Union
+
 import torch
 import torch.nn as nn
 
@@ -28,4 +30,55 @@ class RMSNorm(nn.Module):
             self.weight.data,
             self.variance_epsilon,
         )
-        return out
\ No newline at end of file
+        return out
+
+
+class LayerNorm(nn.Module):
+    """Layer normalization with a fused parallel-residual path.
+
+    Drop-in replacement for ``nn.LayerNorm`` over the last dimension. When a
+    residual is given, computes z = x + y + residual (y may be omitted if the
+    branch outputs were summed beforehand) and norm(z) in a single kernel and
+    returns both, so that z can serve as the residual of the next layer
+    without an extra pass over the hidden states.
+    """
+
+    def __init__(
+        self,
+        hidden_size: int,
+        eps: float = 1e-5,
+    ) -> None:
+        super().__init__()
+        self.weight = nn.Parameter(torch.ones(hidden_size))
+        self.bias = nn.Parameter(torch.zeros(hidden_size))
+        self.variance_epsilon = eps
+
+    def forward(
+        self,
+        x: torch.Tensor,
+        y: Optional[torch.Tensor] = None,
+        residual: Optional[torch.Tensor] = None,
+    ) -> Union[torch.Tensor, Tuple[torch.Tensor, torch.Tensor]]:
+        if residual is None:
+            out = torch.empty_like(x)
+            layernorm_ops.layer_norm(
+                out,
+                x,
+                self.weight.data,
+                self.bias.data,
+                self.variance_epsilon,
+            )
+            return out
+        out = torch.empty_like(x)
+        sum_out = torch.empty_like(x)
+        layernorm_ops.fused_add_layer_norm(
+            out,
+            sum_out,
+            x,
+            y,
+            residual,
+            self.weight.data,
+            self.bias.data,
+            self.variance_epsilon,
+        )
+        return out, sum_out
\ No newline at end of file
@@ -4,12 +4,15 @@ from aphrodite.modeling.layers.quantized_linear.awq import (
     AWQColumnParallelLinear, AWQRowParallelLinear)
 from aphrodite.modeling.layers.quantized_linear.gptq import(
     GPTQColumnParallelLinear, GPTQRowParallelLinear, GPTQLinear)
+from aphrodite.modeling.layers.quantized_linear.smoothquant import (
+    SQColumnParallelLinear, SQRowParallelLinear)
 from aphrodite.modeling.megatron.tensor_parallel import (
     ColumnParallelLinear, RowParallelLinear)
 
 _QUANTIZED_LINEAR_REGISTRY = {
     "awq": (AWQColumnParallelLinear, AWQRowParallelLinear, None),
     "gptq": (GPTQColumnParallelLinear, GPTQRowParallelLinear, GPTQLinear),
+    "smoothquant": (SQColumnParallelLinear, SQRowParallelLinear, None),
 }
 
 
@@ -0,0 +1,98 @@
+from typing import Optional
+
+import torch
+from torch.nn.parameter import Parameter
+
+from aphrodite.modeling.megatron.tensor_parallel.layers import (
+    ColumnParallelLinear, RowParallelLinear)
+
+
+def _int8_gemm(
+    x: torch.Tensor,
+    weight: torch.Tensor,
+    weight_scale: torch.Tensor,
+) -> torch.Tensor:
+    """W8A8 GEMM with dynamic per-token activation quantization.
+
+    The weights are quantized offline with a per-output-channel scale; the
+    activations are quantized symmetrically per token here, so no activation
+    statistics need to be shipped with the checkpoint.
+    """
+    x_scale = x.abs().amax(dim=-1, keepdim=True).float() / 127.0
+    x_scale = x_scale.clamp(min=1e-10)
+    x_q = torch.round(x / x_scale.to(x.dtype)).to(torch.int8)
+    # torch._int_mm refuses m <= 16 on CUDA (a cuBLAS INT8 restriction in
+    # torch 2.0), which is exactly the decode regime: the worker does not
+    # pad quantized batches, so m is the batch size. Pad the token dimension
+    # with zero rows and slice the result.
+    num_tokens = x_q.shape[0]
+    if num_tokens <= 16:
+        x_q = torch.nn.functional.pad(x_q, (0, 0, 0, 17 - num_tokens))
+    out = torch._int_mm(x_q, weight.t())
+    if num_tokens <= 16:
+        out = out[:num_tokens]
+    # Dequantize in FP32: the INT32 accumulators can exceed the FP16 range.
+    out = out.float() * (x_scale * weight_scale)
+    return out.to(x.dtype)
+
+
+class SQColumnParallelLinear(ColumnParallelLinear):
+
+    def create_weights(self, dtype: torch.dtype) -> None:
+        self.weight = Parameter(
+            torch.empty(
+                self.output_size_per_partition,
+                self.input_size,
+                device="cuda",
+                dtype=torch.int8,
+            ),
+            requires_grad=False,
+        )
+        self.weight_scale = Parameter(
+            torch.empty(
+                self.output_size_per_partition,
+                device="cuda",
+                dtype=torch.float32,
+            ),
+            requires_grad=False,
+        )
+
+    def apply_weights(
+        self,
+        x: torch.Tensor,
+        bias: Optional[torch.Tensor],
+    ) -> torch.Tensor:
+        out_shape = (x.shape[-2], self.weight.shape[0])
+        reshaped_x = x.reshape(-1, x.shape[-1])
+        out = _int8_gemm(reshaped_x, self.weight, self.weight_scale)
+        if bias is not None:
+            out = out + bias
+        return out.reshape(out_shape)
+
+
+class SQRowParallelLinear(RowParallelLinear):
+
+    def create_weights(self, dtype: torch.dtype) -> None:
+        self.weight = Parameter(
+            torch.empty(
+                self.output_size,
+                self.input_size_per_partition,
+                device="cuda",
+                dtype=torch.int8,
+            ),
+            requires_grad=False,
+        )
+        self.weight_scale = Parameter(
+            torch.empty(
+                self.output_size,
+                device="cuda",
+                dtype=torch.float32,
+            ),
+            requires_grad=False,
+        )
+
+    def apply_weights(self, x: torch.Tensor) -> torch.Tensor:
+        out_shape = (x.shape[-2], self.weight.shape[0])
+        reshaped_x = x.reshape(-1, x.shape[-1])
+        out = _int8_gemm(reshaped_x, self.weight, self.weight_scale)
+        return out.reshape(out_shape)
@@ -22,7 +22,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Rotary Positional Embeddings."""
-from typing import Tuple, Union
+from typing import Any, Dict, Optional, Tuple, Union
 
 import torch
 import torch.nn as nn
@@ -167,4 +167,56 @@ class DynamicNTKScalingRotaryEmbedding(RotaryEmbedding):
         cos = freqs.cos()
         sin = freqs.sin()
         cache = torch.cat((cos, sin), dim=-1)
-        return cache
\ No newline at end of file
+        return cache
+
+
+_ROPE_DICT: Dict[Tuple, RotaryEmbedding] = {}
+
+
+def get_rope(
+    head_size: int,
+    rotary_dim: int,
+    max_position: int,
+    base: int,
+    is_neox_style: bool,
+    rope_scaling: Optional[Dict[str, Any]] = None,
+) -> RotaryEmbedding:
+    """Get a rotary embedding module, reusing an existing one if possible.
+
+    All attention layers of a model use the same rotary parameters, so the
+    cos/sin cache only needs to be computed and stored once instead of once
+    per layer.
+    """
+    if rope_scaling is not None:
+        # Dicts are not hashable; flatten the items into the key.
+        rope_scaling_key = tuple(sorted(rope_scaling.items()))
+    else:
+        rope_scaling_key = None
+    # The cos/sin cache is materialized in the default dtype at construction
+    # time, so the dtype must be part of the key: otherwise two models with
+    # the same RoPE parameters but different dtypes would share one cache
+    # and the rotary kernel would see a dtype mismatch.
+    key = (head_size, rotary_dim, max_position, base, is_neox_style,
+           rope_scaling_key, torch.get_default_dtype())
+    if key in _ROPE_DICT:
+        return _ROPE_DICT[key]
+
+    if rope_scaling is None:
+        rotary_emb = RotaryEmbedding(head_size, rotary_dim, max_position,
+                                     base, is_neox_style)
+    else:
+        scaling_type = rope_scaling["type"]
+        scaling_factor = rope_scaling["factor"]
+        if scaling_type == "linear":
+            rotary_emb = LinearScalingRotaryEmbedding(head_size, rotary_dim,
+                                                      max_position, base,
+                                                      is_neox_style,
+                                                      scaling_factor)
+        elif scaling_type == "dynamic":
+            rotary_emb = DynamicNTKScalingRotaryEmbedding(
+                head_size, rotary_dim, max_position, base, is_neox_style,
+                scaling_factor)
+        else:
+            raise ValueError(f"Unknown RoPE scaling type {scaling_type}")
+    _ROPE_DICT[key] = rotary_emb
+    return rotary_emb
\ No newline at end of file
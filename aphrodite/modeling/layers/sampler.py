@@ -6,6 +6,7 @@ import torch
 import torch.nn as nn
 
 from aphrodite.modeling.metadata import InputMetadata
+from aphrodite.modeling.layers.quantized_linear.smoothquant import _int8_gemm
 from aphrodite.modeling.megatron.tensor_parallel import (
     gather_from_tensor_model_parallel_region)
 from aphrodite.common.sampling_params import SamplingParams, SamplingType
@@ -39,13 +40,14 @@ class Sampler(nn.Module):
         hidden_states: torch.Tensor,
         input_metadata: InputMetadata,
         embedding_bias: Optional[torch.Tensor] = None,
+        embedding_scale: Optional[torch.Tensor] = None,
     ) -> SamplerOutput:
         # Get the hidden states that we use for sampling.
         hidden_states = _prune_hidden_states(hidden_states, input_metadata)
 
         # Get the logits for the next tokens.
         logits = _get_logits(hidden_states, embedding, embedding_bias,
-                             self.vocab_size)
+                             self.vocab_size, embedding_scale)
 
         # Apply presence and frequency penalties.
         output_tokens = _get_output_tokens(input_metadata)
@@ -112,11 +114,22 @@ class Sampler(nn.Module):
         return _sample(probs, logprobs, input_metadata)
 
 
-def _get_logits(hidden_states: torch.Tensor, embedding: torch.Tensor,
+def _get_logits(hidden_states: torch.Tensor,
+                embedding: torch.Tensor,
                 embedding_bias: Optional[torch.Tensor],
-                vocab_size: int) -> torch.Tensor:
+                vocab_size: int,
+                embedding_scale: Optional[torch.Tensor] = None) -> torch.Tensor:
     # Get the logits for the next tokens.
-    logits = torch.matmul(hidden_states, embedding.t())
+    if embedding_scale is not None:
+        # The embedding was quantized to INT8 with a per-channel scale after
+        # loading. The logit GEMM is memory-bound at decode time, so halving
+        # the bytes read for the [vocab, hidden] weight halves its latency.
+        # The hidden states are pruned to one row per sequence here, so the
+        # GEMM's m is the batch size; _int8_gemm pads m <= 16 batches to
+        # satisfy torch._int_mm.
+        logits = _int8_gemm(hidden_states, embedding, embedding_scale)
+    else:
+        logits = torch.matmul(hidden_states, embedding.t())
     if embedding_bias is not None:
         logits += embedding_bias
     logits = gather_from_tensor_model_parallel_region(logits)
@@ -23,6 +23,7 @@ _MODEL_CLASSES_SUPPORT_QUANTIZATION = {
     "gptq": [
         LlamaForCausalLM, GPTJForCausalLM, GPTNeoXForCausalLM
     ],
+    "smoothquant": [GPTJForCausalLM],
 }
 
 
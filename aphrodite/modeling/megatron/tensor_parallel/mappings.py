@@ -3,6 +3,8 @@
 # Adapted from https://github.com/NVIDIA/Megatron-LM/blob/main/megatron/core/tensor_parallel/mappings.py
 # Copyright (c) 2022, NVIDIA CORPORATION. All rights reserved.
 
+import os
+
 import torch
 
 from aphrodite.modeling.megatron.parallel_state import (
@@ -12,6 +14,11 @@ from aphrodite.modeling.megatron.parallel_state import (
 )
 from .utils import split_tensor_along_last_dim
 
+# If set to "1", the tensor parallel all-reduce payload is quantized to INT4
+# with a per-token FP16 scale, cutting the communicated bytes by ~4x at the
+# cost of a small amount of activation noise. Off by default.
+_QUANTIZED_ALLREDUCE = os.getenv("APHRODITE_QUANTIZED_ALLREDUCE", "0") == "1"
+
 
 def _reduce(input_):
     """All-reduce the input tensor across model parallel group."""
@@ -20,12 +27,58 @@ def _reduce(input_):
     if get_tensor_model_parallel_world_size()==1:
         return input_
 
+    if _QUANTIZED_ALLREDUCE:
+        return _quantized_reduce(input_)
+
     # All-reduce.
     torch.distributed.all_reduce(input_, group=get_tensor_model_parallel_group())
 
     return input_
 
 
+def _quantized_reduce(input_):
+    """All-reduce the input tensor with an INT4-quantized payload.
+
+    NCCL cannot sum quantized operands, so the reduction is an all-gather of
+    the packed INT4 payloads and per-token scales, followed by a local
+    dequantize-and-sum. Each value is quantized symmetrically per token to
+    [-8, 7] and two values are packed into one byte, so the bytes on the wire
+    are roughly a quarter of the FP16 all-reduce.
+    """
+    world_size = get_tensor_model_parallel_world_size()
+    group = get_tensor_model_parallel_group()
+
+    orig_shape = input_.shape
+    hidden_size = orig_shape[-1]
+    assert hidden_size % 2 == 0, (
+        "INT4 packing requires an even hidden size")
+    x = input_.reshape(-1, hidden_size)
+
+    # Per-token symmetric quantization to 4 bits.
+    scale = x.abs().amax(dim=-1, keepdim=True).clamp(min=1e-5) / 7.0
+    scale = scale.half()
+    q = torch.round(x / scale).clamp(-8, 7).to(torch.int8)
+    # Bias to [0, 15] and pack two nibbles per byte.
+    q = (q + 8).to(torch.uint8)
+    packed = q[..., 0::2] | (q[..., 1::2] << 4)
+
+    packed_list = [torch.empty_like(packed) for _ in range(world_size)]
+    scale_list = [torch.empty_like(scale) for _ in range(world_size)]
+    torch.distributed.all_gather(packed_list, packed, group=group)
+    torch.distributed.all_gather(scale_list, scale, group=group)
+
+    # Dequantize and sum the per-rank contributions in FP32.
+    out = torch.zeros_like(x, dtype=torch.float32)
+    deq = torch.empty_like(x, dtype=torch.float32)
+    for packed_rank, scale_rank in zip(packed_list, scale_list):
+        deq[..., 0::2] = (packed_rank & 0xF).float() - 8.0
+        deq[..., 1::2] = (packed_rank >> 4).float() - 8.0
+        out += deq * scale_rank.float()
+    input_.copy_(out.reshape(orig_shape))
+
+    return input_
+
+
 def _split_along_last_dim(input_):
     """Split the tensor along its last dimension and keep the
     corresponding slice."""
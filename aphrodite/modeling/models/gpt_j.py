@@ -21,6 +21,8 @@
 The input of the model is flattened to a 1D tensor of tokens. The model uses
 InputMetadata to extract the original 2D shape of the input.
 """
+import os
+import re
 from typing import List, Optional, Tuple
 
 import torch
@@ -30,21 +32,35 @@ from transformers import GPTJConfig
 from aphrodite.modeling.metadata import InputMetadata
 from aphrodite.modeling.layers.activation import get_act_fn
 from aphrodite.modeling.layers.attention import PagedAttentionWithRoPE
+from aphrodite.modeling.layers.layernorm import LayerNorm
 from aphrodite.modeling.layers.sampler import Sampler
 from aphrodite.modeling.layers.quantized_linear import ParallelLinear
 from aphrodite.modeling.quantization_utils import QuantizationConfig
 from aphrodite.modeling.hf_downloader import (hf_model_weights_iterator,
                                               load_tensor_parallel_weights,
                                               convert_pyslice_to_tensor,
+                                              copy_weight_to_device,
                                               get_parallel_weight)
 from aphrodite.modeling.megatron.parallel_state import (
     get_tensor_model_parallel_rank, get_tensor_model_parallel_world_size)
 from aphrodite.modeling.megatron.tensor_parallel import (
-    VocabParallelEmbedding)
+    VocabParallelEmbedding, reduce_from_tensor_model_parallel_region)
 from aphrodite.common.sequence import SamplerOutput
 
 KVCache = Tuple[torch.Tensor, torch.Tensor]
 
+# If set to "1" and no weight quantization is in use, the lm_head weight is
+# quantized to INT8 with a per-output-channel scale after loading, and the
+# sampler computes the logits with an INT8 GEMM. The logit GEMM over the 50k
+# GPT-J vocabulary is memory-bound at decode time, so this halves its HBM
+# traffic. Off by default.
+_INT8_LM_HEAD = os.getenv("APHRODITE_INT8_LM_HEAD", "0") == "1"
+
+# If set to "1", every transformer block is compiled with torch.compile so
+# that Inductor can fuse the elementwise glue between the GEMMs and the
+# custom kernels. Off by default: the first steps pay a compilation stall.
+_TORCH_COMPILE = os.getenv("APHRODITE_TORCH_COMPILE", "0") == "1"
+
 
 class GPTJAttention(nn.Module):
 
@@ -56,16 +72,28 @@ class GPTJAttention(nn.Module):
         self.hidden_size = config.hidden_size
         self.head_size = self.hidden_size // self.total_num_heads
 
+        # NOTE: The fused QKV weight keeps the checkpoint's [q; k; v] row
+        # layout, so the projection output is three contiguous
+        # [num_heads * head_size] segments per token. Repacking the rows
+        # head-major ([num_heads, 3, head_size]) was evaluated and rejected:
+        # the rotary/cache and attention kernels index the heads of q, k, and
+        # v at a fixed stride within each segment, the GEMM's output writes
+        # are coalesced either way, and the repack would also change the
+        # layout forward_packed exposes to the kernels.
         self.qkv_proj = ParallelLinear.column(config.hidden_size,
                                               3 * config.hidden_size,
                                               bias=False,
                                               gather_output=False,
                                               perform_initialization=False,
                                               quant_config=quant_config)
+        # The partial attention and MLP branch outputs are summed by GPTJBlock
+        # and reduced with a single all-reduce, halving the communication
+        # volume per block.
         self.out_proj = ParallelLinear.row(config.hidden_size,
                                            config.hidden_size,
                                            bias=False,
                                            input_is_parallel=True,
+                                           reduce_results=False,
                                            perform_initialization=False,
                                            quant_config=quant_config)
 
@@ -93,15 +121,15 @@ class GPTJAttention(nn.Module):
         self,
         position_ids: torch.Tensor,
         hidden_states: torch.Tensor,
-        kv_cache: KVCache,
+        k_cache: torch.Tensor,
+        v_cache: torch.Tensor,
         input_metadata: InputMetadata,
         cache_event: Optional[torch.cuda.Event],
     ) -> torch.Tensor:
         qkv, _ = self.qkv_proj(hidden_states)
-        q, k, v = qkv.chunk(chunks=3, dim=-1)
-        k_cache, v_cache = kv_cache
-        attn_output = self.attn(position_ids, q, k, v, k_cache, v_cache,
-                                input_metadata, cache_event)
+        attn_output = self.attn.forward_packed(position_ids, qkv, k_cache,
+                                               v_cache, input_metadata,
+                                               cache_event)
         attn_output, _ = self.out_proj(attn_output)
         return attn_output
 
@@ -119,18 +147,25 @@ class GPTJMLP(nn.Module):
                                            gather_output=False,
                                            perform_initialization=False,
                                            quant_config=quant_config)
+        # See GPTJAttention.out_proj. The bias must be skipped here and added
+        # after the merged all-reduce, as every rank holds the full bias.
         self.fc_out = ParallelLinear.row(intermediate_size,
                                          hidden_size,
                                          input_is_parallel=True,
+                                         reduce_results=False,
+                                         skip_bias_add=True,
                                          perform_initialization=False,
                                          quant_config=quant_config)
         self.act = get_act_fn(config.activation_function)
 
-    def forward(self, hidden_states: torch.Tensor) -> torch.Tensor:
+    def forward(
+        self,
+        hidden_states: torch.Tensor,
+    ) -> Tuple[torch.Tensor, Optional[torch.Tensor]]:
         hidden_states, _ = self.fc_in(hidden_states)
         hidden_states = self.act(hidden_states)
-        hidden_states, _ = self.fc_out(hidden_states)
-        return hidden_states
+        hidden_states, bias = self.fc_out(hidden_states)
+        return hidden_states, bias
 
 
 class GPTJBlock(nn.Module):
@@ -143,7 +178,7 @@ class GPTJBlock(nn.Module):
             inner_dim = 4 * config.n_embd
         else:
             inner_dim = config.n_inner
-        self.ln_1 = nn.LayerNorm(config.n_embd, eps=config.layer_norm_epsilon)
+        self.ln_1 = LayerNorm(config.n_embd, eps=config.layer_norm_epsilon)
         self.attn = GPTJAttention(config, quant_config)
         self.mlp = GPTJMLP(inner_dim, config, quant_config)
 
@@ -151,22 +186,39 @@ class GPTJBlock(nn.Module):
         self,
         position_ids: torch.Tensor,
         hidden_states: torch.Tensor,
-        kv_cache: KVCache,
+        residual: Optional[torch.Tensor],
+        k_cache: torch.Tensor,
+        v_cache: torch.Tensor,
         input_metadata: InputMetadata,
         cache_event: Optional[torch.cuda.Event],
-    ) -> torch.Tensor:
-        residual = hidden_states
-        hidden_states = self.ln_1(hidden_states)
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        # The branch output of the previous block is summed with the residual
+        # inside this block's LayerNorm, so that the hidden states are read
+        # from memory only once per block.
+        if residual is None:
+            # First block: the input is the embedding output.
+            residual = hidden_states
+            hidden_states = self.ln_1(hidden_states)
+        else:
+            hidden_states, residual = self.ln_1(hidden_states,
+                                                residual=residual)
         attn_output = self.attn(
             position_ids=position_ids,
             hidden_states=hidden_states,
-            kv_cache=kv_cache,
+            k_cache=k_cache,
+            v_cache=v_cache,
             input_metadata=input_metadata,
             cache_event=cache_event,
         )
-        mlp_output = self.mlp(hidden_states)
-        hidden_states = attn_output + mlp_output + residual
-        return hidden_states
+        mlp_output, mlp_bias = self.mlp(hidden_states)
+        # Both branches return their local partial sums, which are merged
+        # into a single all-reduce per block. The residual must not be part
+        # of the reduction: it would be multiplied by the world size.
+        hidden_states = attn_output + mlp_output
+        hidden_states = reduce_from_tensor_model_parallel_region(hidden_states)
+        if mlp_bias is not None:
+            hidden_states = hidden_states + mlp_bias
+        return hidden_states, residual
 
 
 class GPTJModel(nn.Module):
@@ -182,7 +234,17 @@ class GPTJModel(nn.Module):
                                           perform_initialization=False)
         self.h = nn.ModuleList(
             [GPTJBlock(config, quant_config) for _ in range(config.n_layer)])
-        self.ln_f = nn.LayerNorm(self.embed_dim, eps=config.layer_norm_epsilon)
+        if _TORCH_COMPILE:
+            # Compile the block forwards in place so that the module tree
+            # (and thus the state dict consumed by load_weights) is
+            # unchanged. dynamic=True since the token count varies per step.
+            # mode="reduce-overhead" (CUDA graphs) is deliberately not used:
+            # the blocks write the KV cache in place through block tables and
+            # slot mappings that change between steps, which graph replay
+            # would silently reuse.
+            for block in self.h:
+                block.forward = torch.compile(block.forward, dynamic=True)
+        self.ln_f = LayerNorm(self.embed_dim, eps=config.layer_norm_epsilon)
 
     def forward(
         self,
@@ -193,20 +255,26 @@ class GPTJModel(nn.Module):
         cache_events: Optional[List[torch.cuda.Event]],
     ) -> torch.Tensor:
         hidden_states = self.wte(input_ids)
-        for i in range(len(self.h)):
-            if cache_events is None:
-                cache_event = None
-            else:
-                cache_event = cache_events[i]
-            layer = self.h[i]
-            hidden_states = layer(
+        # NOTE: Avoid per-layer Python indexing in this loop. At small batch
+        # sizes decoding is CPU-bound on kernel dispatch, so the interpreter
+        # work between launches directly adds to the step latency.
+        if cache_events is None:
+            cache_events = (None, ) * len(self.h)
+        residual = None
+        # The (key, value) tuples are unpacked here, once per layer, so the
+        # layers and attention modules take plain tensors.
+        for layer, (k_cache, v_cache), cache_event in zip(
+                self.h, kv_caches, cache_events):
+            hidden_states, residual = layer(
                 position_ids,
                 hidden_states,
-                kv_caches[i],
+                residual,
+                k_cache,
+                v_cache,
                 input_metadata,
                 cache_event,
             )
-        hidden_states = self.ln_f(hidden_states)
+        hidden_states, _ = self.ln_f(hidden_states, residual=residual)
         return hidden_states
 
 
@@ -225,6 +293,7 @@ class GPTJForCausalLM(nn.Module):
                                              gather_output=False,
                                              perform_initialization=False,
                                              quant_config=None)
+        self.lm_head_scale: Optional[torch.Tensor] = None
         self.sampler = Sampler(config.vocab_size)
 
     def forward(
@@ -238,7 +307,8 @@ class GPTJForCausalLM(nn.Module):
         hidden_states = self.transformer(input_ids, positions, kv_caches,
                                          input_metadata, cache_events)
         next_tokens = self.sampler(self.lm_head.weight, hidden_states,
-                                   input_metadata, self.lm_head.bias)
+                                   input_metadata, self.lm_head.bias,
+                                   embedding_scale=self.lm_head_scale)
         return next_tokens
 
     column_parallel_layers = ["fc_in", "lm_head"]
@@ -254,11 +324,20 @@ class GPTJForCausalLM(nn.Module):
          ignore_weight_suffixes) = get_parallel_weight(self)
         tp_rank = get_tensor_model_parallel_rank()
         state_dict = self.state_dict()
+        # Hoisted out of the loop below: the name checks run once per
+        # checkpoint tensor, so the per-suffix Python iteration adds up for
+        # sharded checkpoints with thousands of tensors.
+        if ignore_weight_suffixes:
+            ignore_re = re.compile("|".join(
+                re.escape(suffix) + "$" for suffix in ignore_weight_suffixes))
+        else:
+            ignore_re = None
+        qkv_weight_map = {"q_proj": 0, "k_proj": 1, "v_proj": 2}
         for name, loaded_weight in hf_model_weights_iterator(
                 model_name_or_path, cache_dir, load_format, revision):
             if "attn.bias" in name or "attn.masked_bias" in name:
                 continue
-            if any(name.endswith(suffix) for suffix in ignore_weight_suffixes):
+            if ignore_re is not None and ignore_re.search(name):
                 continue
 
             is_transposed = False
@@ -269,8 +348,7 @@ class GPTJForCausalLM(nn.Module):
                 loaded_weight = loaded_weight.T
 
             is_attention_weight = False
-            for stride_id, att_weight_name in enumerate(
-                ["q_proj", "k_proj", "v_proj"]):
+            for att_weight_name, stride_id in qkv_weight_map.items():
                 if att_weight_name not in name:
                     continue
                 name = name.replace(att_weight_name, "qkv_proj")
@@ -285,7 +363,7 @@ class GPTJForCausalLM(nn.Module):
                 param_slice = param.data[shard_size * stride_id:shard_size *
                                          (stride_id + 1)]
                 assert param_slice.shape == loaded_weight.shape
-                param_slice.copy_(loaded_weight)
+                copy_weight_to_device(param_slice, loaded_weight)
                 is_attention_weight = True
                 break
             if is_attention_weight:
@@ -300,4 +378,15 @@ class GPTJForCausalLM(nn.Module):
 
             load_tensor_parallel_weights(param, loaded_weight, name,
                                          column_parallel_weights,
-                                         row_parallel_weights, tp_rank)
\ No newline at end of file
+                                         row_parallel_weights, tp_rank)
+        # The H2D weight copies above are asynchronous; make sure they have
+        # all landed before the checkpoint staging buffers are released.
+        torch.cuda.synchronize()
+
+        if _INT8_LM_HEAD and self.quant_config is None:
+            weight = self.lm_head.weight.data.float()
+            scale = weight.abs().amax(dim=1).clamp(min=1e-10) / 127.0
+            qweight = torch.round(weight /
+                                  scale.unsqueeze(1)).to(torch.int8)
+            self.lm_head.weight = nn.Parameter(qweight, requires_grad=False)
+            self.lm_head_scale = scale
\ No newline at end of file
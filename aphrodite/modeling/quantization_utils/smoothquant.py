@@ -0,0 +1,74 @@
+from typing import Any, Dict, List
+
+import torch
+
+from aphrodite.modeling.quantization_utils.base import QuantizationConfig
+
+
+class SmoothQuantConfig(QuantizationConfig):
+    """Config class for SmoothQuant W8A8.
+
+    Reference: https://arxiv.org/abs/2211.10438
+    """
+
+    def __init__(
+        self,
+        weight_bits: int = 8,
+        act_bits: int = 8,
+    ) -> None:
+        self.weight_bits = weight_bits
+        self.act_bits = act_bits
+
+        if self.weight_bits != 8 or self.act_bits != 8:
+            raise ValueError(
+                "Currently, only W8A8 quantization is supported for "
+                f"SmoothQuant, but got {self.weight_bits}-bit weights and "
+                f"{self.act_bits}-bit activations.")
+
+    def __repr__(self) -> str:
+        return (f"SmoothQuantConfig(weight_bits={self.weight_bits}, "
+                f"act_bits={self.act_bits})")
+
+    @classmethod
+    def get_name(cls) -> str:
+        return "smoothquant"
+
+    @classmethod
+    def get_supported_act_dtypes(cls) -> List[torch.dtype]:
+        return [torch.half, torch.bfloat16]
+
+    @classmethod
+    def get_min_capability(cls) -> int:
+        # The INT8 GEMM is backed by torch._int_mm, which requires
+        # Ampere or newer GPUs.
+        return 80
+
+    @classmethod
+    def get_config_filenames(cls) -> List[str]:
+        return ["quant_config.json"]
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "SmoothQuantConfig":
+        weight_bits = cls.get_from_keys(config, ["w_bit", "bits"])
+        act_bits = cls.get_from_keys(config, ["a_bit", "bits"])
+        return cls(weight_bits, act_bits)
+
+    @classmethod
+    def get_packed_tensor_names(cls) -> List[str]:
+        return []
+
+    @classmethod
+    def get_transposed_tensor_names(cls) -> List[str]:
+        return []
+
+    def get_row_tp_tensor_names(self) -> List[str]:
+        return ["weight"]
+
+    def get_column_tp_tensor_names(self) -> List[str]:
+        return ["weight", "weight_scale", "bias"]
+
+    def get_ignore_tensor_names(self) -> List[str]:
+        # The activation smoothing factors are already folded into the
+        # exported weights and the preceding LayerNorm; the activations
+        # themselves are quantized dynamically per token at runtime.
+        return ["act_scale"]
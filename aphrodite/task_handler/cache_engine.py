@@ -34,7 +34,10 @@ class CacheEngine:
         self.head_size = model_config.get_head_size()
         self.num_layers = model_config.get_num_layers(parallel_config)
         self.num_heads = model_config.get_num_kv_heads(parallel_config)
-        self.dtype = model_config.dtype
+        # The cache may be stored in a narrower dtype than the model (FP8
+        # E4M3 is stored as uint8; the kernels convert on access).
+        self.dtype = _get_cache_dtype(cache_config.cache_dtype,
+                                      model_config.dtype)
 
         self.block_size = cache_config.block_size
         self.num_gpu_blocks = cache_config.num_gpu_blocks
@@ -67,47 +70,47 @@ class CacheEngine:
             self.block_size,
         )
 
-    def allocate_gpu_cache(self) -> List[KVCache]:
-        gpu_cache: List[KVCache] = []
+    def _view_into_cache_buffer(self, buffer: torch.Tensor,
+                                num_blocks: int) -> List[KVCache]:
         key_block_shape = self.get_key_block_shape()
         value_block_shape = self.get_value_block_shape()
-        for _ in range(self.num_layers):
-            key_blocks = torch.empty(
-                size=(self.num_gpu_blocks, *key_block_shape),
-                dtype=self.dtype,
-                device="cuda",
-            )
-            value_blocks = torch.empty(
-                size=(self.num_gpu_blocks, *value_block_shape),
-                dtype=self.dtype,
-                device="cuda",
-            )
-            gpu_cache.append((key_blocks, value_blocks))
-        return gpu_cache
+        cache: List[KVCache] = []
+        for i in range(self.num_layers):
+            key_blocks = buffer[i][0].view(num_blocks, *key_block_shape)
+            value_blocks = buffer[i][1].view(num_blocks, *value_block_shape)
+            cache.append((key_blocks, value_blocks))
+        return cache
+
+    def allocate_gpu_cache(self) -> List[KVCache]:
+        # A single allocation backs the caches of all the layers: one
+        # cudaMalloc instead of 2 * num_layers, and no fragmentation of the
+        # remaining GPU memory into per-layer slabs. The key and value blocks
+        # of a layer have the same number of elements, so the layers are laid
+        # out as [num_layers, 2, num_blocks, block_numel] and viewed into the
+        # per-layer block shapes.
+        block_numel = self.num_heads * self.head_size * self.block_size
+        buffer = torch.empty(
+            size=(self.num_layers, 2, self.num_gpu_blocks, block_numel),
+            dtype=self.dtype,
+            device="cuda",
+        )
+        return self._view_into_cache_buffer(buffer, self.num_gpu_blocks)
 
     def allocate_cpu_cache(self) -> List[KVCache]:
-        cpu_cache: List[KVCache] = []
-        key_block_shape = self.get_key_block_shape()
-        value_block_shape = self.get_value_block_shape()
         pin_memory = not in_wsl()
         if not pin_memory:
             # Pinning memory in WSL is not supported.
             # https://docs.nvidia.com/cuda/wsl-user-guide/index.html#known-limitations-for-linux-cuda-applications
             logger.warning("Using 'pin_memory=False' as WSL is detected. "
                            "This may slow down the performance.")
-        for _ in range(self.num_layers):
-            key_blocks = torch.empty(
-                size=(self.num_cpu_blocks, *key_block_shape),
-                dtype=self.dtype,
-                pin_memory=pin_memory,
-            )
-            value_blocks = torch.empty(
-                size=(self.num_cpu_blocks, *value_block_shape),
-                dtype=self.dtype,
-                pin_memory=pin_memory,
-            )
-            cpu_cache.append((key_blocks, value_blocks))
-        return cpu_cache
+        # As on the GPU, a single pinned allocation backs all the layers.
+        block_numel = self.num_heads * self.head_size * self.block_size
+        buffer = torch.empty(
+            size=(self.num_layers, 2, self.num_cpu_blocks, block_numel),
+            dtype=self.dtype,
+            pin_memory=pin_memory,
+        )
+        return self._view_into_cache_buffer(buffer, self.num_cpu_blocks)
 
     def _swap(
         self,
@@ -142,6 +145,7 @@ class CacheEngine:
     @staticmethod
     def get_cache_block_size(
         block_size: int,
+        cache_dtype: str,
         model_config: ModelConfig,
         parallel_config: ParallelConfig,
     ) -> int:
@@ -152,9 +156,17 @@ class CacheEngine:
         key_cache_block = block_size * num_heads * head_size
         value_cache_block = key_cache_block
         total = num_layers * (key_cache_block + value_cache_block)
-        dtype_size = _get_dtype_size(model_config.dtype)
+        dtype_size = _get_dtype_size(
+            _get_cache_dtype(cache_dtype, model_config.dtype))
         return dtype_size * total
 
 
+def _get_cache_dtype(cache_dtype: str,
+                     model_dtype: torch.dtype) -> torch.dtype:
+    if cache_dtype == "fp8_e4m3":
+        return torch.uint8
+    return model_dtype
+
+
 def _get_dtype_size(dtype: torch.dtype) -> int:
     return torch.tensor([], dtype=dtype).element_size()
\ No newline at end of file
@@ -13,7 +13,13 @@ from aphrodite.modeling.megatron.parallel_state import (
 from aphrodite.common.sampling_params import SamplingParams
 from aphrodite.common.sequence import SamplerOutput, SequenceData, SequenceGroupMetadata
 from aphrodite.task_handler.cache_engine import CacheEngine
-from aphrodite.common.utils import get_gpu_memory, get_max_shared_memory_bytes
+from aphrodite.common.utils import (get_gpu_memory,
+                                    get_max_shared_memory_bytes, in_wsl)
+
+# Mirrors the flag in the model code: when the transformer blocks are
+# compiled, padding the token count to a power of two keeps the number of
+# distinct shapes (and thus recompilations) logarithmic in the batch size.
+_TOKEN_BUCKETING = os.getenv("APHRODITE_TORCH_COMPILE", "0") == "1"
 
 
 class Worker:
@@ -67,12 +73,34 @@ class Worker:
         set_random_seed(self.model_config.seed)
         self.model = get_model(self.model_config, self.scheduler_config.max_num_batched_tokens)
 
+        # Persistent staging buffers for the flattened token and position
+        # ids: a pinned CPU buffer and a device buffer per input, reused
+        # every step instead of allocating fresh tensors. Sized for the
+        # batching limit plus the padding headroom. Reuse is safe because
+        # the sampler synchronizes with the GPU before the step returns.
+        max_padded_tokens = (
+            (self.scheduler_config.max_num_batched_tokens + 7) // 8 * 8)
+        pin_memory = not in_wsl()
+        self.input_tokens_cpu = torch.empty(max_padded_tokens,
+                                            dtype=torch.long,
+                                            pin_memory=pin_memory)
+        self.input_positions_cpu = torch.empty(max_padded_tokens,
+                                               dtype=torch.long,
+                                               pin_memory=pin_memory)
+        self.input_tokens_gpu = torch.empty(max_padded_tokens,
+                                            dtype=torch.long,
+                                            device="cuda")
+        self.input_positions_gpu = torch.empty(max_padded_tokens,
+                                               dtype=torch.long,
+                                               device="cuda")
+
     @torch.inference_mode()
     def profile_num_available_blocks(
         self,
         block_size: int,
         gpu_memory_utilization: float,
         cpu_swap_space: int,
+        cache_dtype: str = "auto",
     ) -> Tuple[int, int]:
         # Profile the memory usage of the model and get the maximum number of
         # cache blocks that can be allocated with the remaining free memory.
@@ -120,7 +148,7 @@ class Worker:
         peak_memory = torch.cuda.max_memory_allocated()
         total_gpu_memory = get_gpu_memory()
         cache_block_size = CacheEngine.get_cache_block_size(
-            block_size, self.model_config, self.parallel_config)
+            block_size, cache_dtype, self.model_config, self.parallel_config)
         num_gpu_blocks = int(
             (total_gpu_memory * gpu_memory_utilization - peak_memory) //
             cache_block_size)
@@ -190,13 +218,18 @@ class Worker:
                 slot_mapping.extend([0] * prompt_len)
                 continue
 
-            # Compute the slot mapping.
+            # Compute the slot mapping. The slots of a block are consecutive,
+            # so the mapping is built with one range per block instead of
+            # three Python arithmetic ops per token.
             block_table = seq_group_metadata.block_tables[seq_id]
-            for i in range(prompt_len):
-                block_number = block_table[i // self.block_size]
-                block_offset = i % self.block_size
-                slot = block_number * self.block_size + block_offset
-                slot_mapping.append(slot)
+            num_full_blocks = prompt_len // self.block_size
+            for block_number in block_table[:num_full_blocks]:
+                slot = block_number * self.block_size
+                slot_mapping.extend(range(slot, slot + self.block_size))
+            last_block_len = prompt_len % self.block_size
+            if last_block_len > 0:
+                slot = block_table[num_full_blocks] * self.block_size
+                slot_mapping.extend(range(slot, slot + last_block_len))
 
         # Add generation tokens.
         max_context_len = 0
@@ -244,16 +277,32 @@ class Worker:
         # Optimization: Pad the input length to be a multiple of 8.
         # This is required for utilizing the Tensor Cores in NVIDIA GPUs.
         if self.model_config.quantization is None:
-            input_tokens = _pad_to_alignment(input_tokens, multiple_of=8)
-            input_positions = _pad_to_alignment(input_positions, multiple_of=8)
-
-        # Convert to tensors.
-        tokens_tensor = torch.tensor(input_tokens,
-                                     dtype=torch.long,
-                                     device="cuda")
-        positions_tensor = torch.tensor(input_positions,
-                                        dtype=torch.long,
-                                        device="cuda")
+            if _TOKEN_BUCKETING:
+                # Round the token count up to the next power of two (capped
+                # at the batching limit) so the compiled blocks only ever see
+                # a handful of shapes. The padding tokens are ignored by the
+                # attention ops, like the multiple-of-8 padding below.
+                cap = self.scheduler_config.max_num_batched_tokens
+                input_tokens = _pad_to_power_of_two(input_tokens, cap)
+                input_positions = _pad_to_power_of_two(input_positions, cap)
+            else:
+                input_tokens = _pad_to_alignment(input_tokens, multiple_of=8)
+                input_positions = _pad_to_alignment(input_positions,
+                                                    multiple_of=8)
+
+        # Convert to tensors. The tokens and positions go through the
+        # persistent staging buffers: fill the pinned CPU buffer, then issue
+        # an async H2D copy into a narrowed view of the device buffer.
+        num_input_tokens = len(input_tokens)
+        assert num_input_tokens <= self.input_tokens_gpu.shape[0]
+        tokens_cpu = self.input_tokens_cpu[:num_input_tokens]
+        tokens_cpu.copy_(torch.tensor(input_tokens, dtype=torch.long))
+        tokens_tensor = self.input_tokens_gpu[:num_input_tokens]
+        tokens_tensor.copy_(tokens_cpu, non_blocking=True)
+        positions_cpu = self.input_positions_cpu[:num_input_tokens]
+        positions_cpu.copy_(torch.tensor(input_positions, dtype=torch.long))
+        positions_tensor = self.input_positions_gpu[:num_input_tokens]
+        positions_tensor.copy_(positions_cpu, non_blocking=True)
         slot_mapping_tensor = torch.tensor(slot_mapping,
                                            dtype=torch.int,
                                            device="cuda")
@@ -366,6 +415,15 @@ def _pad_to_alignment(x: List[int], multiple_of: int) -> List[int]:
     return x + [0] * ((-len(x)) % multiple_of)
 
 
+def _pad_to_power_of_two(x: List[int], cap: int) -> List[int]:
+    padded_len = 8
+    while padded_len < len(x):
+        padded_len *= 2
+    # Do not pad beyond the batching limit (but never truncate).
+    padded_len = max(min(padded_len, cap), len(x))
+    return x + [0] * (padded_len - len(x))
+
+
 def _pad_to_max(x: List[int], max_len: int) -> List[int]:
     return x + [0] * (max_len - len(x))
 
@@ -23,6 +23,7 @@
 #include "attention_utils.cuh"
 
 #include <algorithm>
+#include <type_traits>
 
 #define WARP_SIZE 32
 #define MAX(a, b) ((a) > (b) ? (a) : (b))
@@ -67,16 +68,20 @@ inline __device__ float block_sum(float* red_smem, float sum) {
 }
 
 // Grid: (num_heads, num_seqs).
+// The KV cache may be stored in a narrower type than the query (FP8 E4M3
+// stored as uint8_t); in that case the loaded vectors are expanded to the
+// compute dtype in registers before use.
 template<
   typename scalar_t,
+  typename cache_t,
   int HEAD_SIZE,
   int BLOCK_SIZE,
   int NUM_THREADS>
 __global__ void single_query_cached_kv_attention_kernel(
   scalar_t* __restrict__ out,             // [num_seqs, num_heads, head_size]
   const scalar_t* __restrict__ q,         // [num_seqs, num_heads, head_size]
-  const scalar_t* __restrict__ k_cache,   // [num_blocks, num_kv_heads, head_size/x, block_size, x]
-  const scalar_t* __restrict__ v_cache,   // [num_blocks, num_kv_heads, head_size, block_size]
+  const cache_t* __restrict__ k_cache,    // [num_blocks, num_kv_heads, head_size/x, block_size, x]
+  const cache_t* __restrict__ v_cache,    // [num_blocks, num_kv_heads, head_size, block_size]
   const int* __restrict__ head_mapping,   // [num_heads]
   const float scale,
   const int* __restrict__ block_tables,   // [num_seqs, max_num_blocks_per_seq]
@@ -109,6 +114,7 @@ __global__ void single_query_cached_kv_attention_kernel(
   constexpr int VEC_SIZE = MAX(16 / (THREAD_GROUP_SIZE * sizeof(scalar_t)), 1);
   using K_vec = typename Vec<scalar_t, VEC_SIZE>::Type;
   using Q_vec = typename Vec<scalar_t, VEC_SIZE>::Type;
+  using Quant_vec = typename Vec<cache_t, VEC_SIZE>::Type;
 
   constexpr int NUM_ELEMS_PER_THREAD = HEAD_SIZE / THREAD_GROUP_SIZE;
   constexpr int NUM_VECS_PER_THREAD = NUM_ELEMS_PER_THREAD / VEC_SIZE;
@@ -140,7 +146,7 @@ __global__ void single_query_cached_kv_attention_kernel(
 
   // x == THREAD_GROUP_SIZE * VEC_SIZE
   // Each thread group fetches x elements from the key at a time.
-  constexpr int x = 16 / sizeof(scalar_t);
+  constexpr int x = 16 / sizeof(cache_t);
   float qk_max = -FLT_MAX;
 
   const int* block_table = block_tables + seq_idx * max_num_blocks_per_seq;
@@ -166,13 +172,20 @@ __global__ void single_query_cached_kv_attention_kernel(
 
 #pragma unroll
       for (int j = 0; j < NUM_VECS_PER_THREAD; j++) {
-        const scalar_t* k_ptr = k_cache + physical_block_number * kv_block_stride
-                                        + kv_head_idx * kv_head_stride
-                                        + physical_block_offset * x;
+        const cache_t* k_ptr = k_cache + physical_block_number * kv_block_stride
+                                       + kv_head_idx * kv_head_stride
+                                       + physical_block_offset * x;
         const int vec_idx = thread_group_offset + j * THREAD_GROUP_SIZE;
         const int offset1 = (vec_idx * VEC_SIZE) / x;
         const int offset2 = (vec_idx * VEC_SIZE) % x;
-        k_vecs[j] = *reinterpret_cast<const K_vec*>(k_ptr + offset1 * BLOCK_SIZE * x + offset2);
+        if constexpr (std::is_same<scalar_t, cache_t>::value) {
+          k_vecs[j] = *reinterpret_cast<const K_vec*>(k_ptr + offset1 * BLOCK_SIZE * x + offset2);
+        } else {
+          // FP8 E4M3 KV cache: expand to the compute dtype.
+          Quant_vec k_vec_quant = *reinterpret_cast<const Quant_vec*>(
+            k_ptr + offset1 * BLOCK_SIZE * x + offset2);
+          k_vecs[j] = fp8_e4m3::vec_conversion<K_vec, Quant_vec>(k_vec_quant);
+        }
       }
 
       // Compute dot product.
@@ -234,6 +247,7 @@ __global__ void single_query_cached_kv_attention_kernel(
   constexpr int V_VEC_SIZE = MIN(16 / sizeof(scalar_t), BLOCK_SIZE);
   using V_vec = typename Vec<scalar_t, V_VEC_SIZE>::Type;
   using L_vec = typename Vec<scalar_t, V_VEC_SIZE>::Type;
+  using V_quant_vec = typename Vec<cache_t, V_VEC_SIZE>::Type;
   using Float_L_vec = typename FloatVec<L_vec>::Type;
 
   constexpr int NUM_V_VECS_PER_ROW = BLOCK_SIZE / V_VEC_SIZE;
@@ -256,14 +270,21 @@ __global__ void single_query_cached_kv_attention_kernel(
     L_vec logits_vec;
     from_float(logits_vec, *reinterpret_cast<Float_L_vec*>(logits + token_idx));
 
-    const scalar_t* v_ptr = v_cache + physical_block_number * kv_block_stride
-                                    + kv_head_idx * kv_head_stride;
+    const cache_t* v_ptr = v_cache + physical_block_number * kv_block_stride
+                                   + kv_head_idx * kv_head_stride;
 #pragma unroll
     for (int i = 0; i < NUM_ROWS_PER_THREAD; i++) {
       const int row_idx = lane / NUM_V_VECS_PER_ROW + i * NUM_ROWS_PER_ITER;
       if (row_idx < HEAD_SIZE) {
         const int offset = row_idx * BLOCK_SIZE + physical_block_offset;
-        V_vec v_vec = *reinterpret_cast<const V_vec*>(v_ptr + offset);
+        V_vec v_vec;
+        if constexpr (std::is_same<scalar_t, cache_t>::value) {
+          v_vec = *reinterpret_cast<const V_vec*>(v_ptr + offset);
+        } else {
+          // FP8 E4M3 KV cache: expand to the compute dtype.
+          V_quant_vec v_vec_quant = *reinterpret_cast<const V_quant_vec*>(v_ptr + offset);
+          v_vec = fp8_e4m3::vec_conversion<V_vec, V_quant_vec>(v_vec_quant);
+        }
         if (block_idx == num_blocks - 1) {
           // NOTE: When v_vec contains the tokens that are out of the context,
           // we should explicitly zero out the values since they may contain NaNs.
@@ -340,11 +361,11 @@ __global__ void single_query_cached_kv_attention_kernel(
 
 } // namespace aphrodite
 
-#define LAUNCH_ATTENTION_KERNEL(T, HEAD_SIZE, BLOCK_SIZE, NUM_THREADS)                        \
-  cudaFuncSetAttribute(                                                                       \
-      aphrodite::single_query_cached_kv_attention_kernel<T, HEAD_SIZE, BLOCK_SIZE, NUM_THREADS>,   \
-      cudaFuncAttributeMaxDynamicSharedMemorySize, shared_mem_size);                          \
-  aphrodite::single_query_cached_kv_attention_kernel<T, HEAD_SIZE, BLOCK_SIZE, NUM_THREADS>        \
+#define LAUNCH_ATTENTION_KERNEL(T, CACHE_T, HEAD_SIZE, BLOCK_SIZE, NUM_THREADS)                        \
+  cudaFuncSetAttribute(                                                                                \
+      aphrodite::single_query_cached_kv_attention_kernel<T, CACHE_T, HEAD_SIZE, BLOCK_SIZE, NUM_THREADS>,   \
+      cudaFuncAttributeMaxDynamicSharedMemorySize, shared_mem_size);                                   \
+  aphrodite::single_query_cached_kv_attention_kernel<T, CACHE_T, HEAD_SIZE, BLOCK_SIZE, NUM_THREADS>        \
   <<<grid, block, shared_mem_size, stream>>>(                                                 \
     out_ptr,                                                                                  \
     query_ptr,                                                                                \
@@ -363,6 +384,7 @@ __global__ void single_query_cached_kv_attention_kernel(
 // TODO: Tune NUM_THREADS.
 template<
   typename T,
+  typename CACHE_T,
   int BLOCK_SIZE,
   int NUM_THREADS = 128>
 void single_query_cached_kv_attention_launcher(
@@ -394,8 +416,8 @@ void single_query_cached_kv_attention_launcher(
 
   T* out_ptr = reinterpret_cast<T*>(out.data_ptr());
   T* query_ptr = reinterpret_cast<T*>(query.data_ptr());
-  T* key_cache_ptr = reinterpret_cast<T*>(key_cache.data_ptr());
-  T* value_cache_ptr = reinterpret_cast<T*>(value_cache.data_ptr());
+  CACHE_T* key_cache_ptr = reinterpret_cast<CACHE_T*>(key_cache.data_ptr());
+  CACHE_T* value_cache_ptr = reinterpret_cast<CACHE_T*>(value_cache.data_ptr());
   int* head_mapping_ptr = reinterpret_cast<int*>(head_mapping.data_ptr());
   int* block_tables_ptr = block_tables.data_ptr<int>();
   int* context_lens_ptr = context_lens.data_ptr<int>();
@@ -415,31 +437,31 @@ void single_query_cached_kv_attention_launcher(
     // NOTE: To reduce the compilation time, we omitted head sizes
     // 32, 160, 192.
     // case 32:
-    //   LAUNCH_ATTENTION_KERNEL(T, 32, BLOCK_SIZE, NUM_THREADS);
+    //   LAUNCH_ATTENTION_KERNEL(T, CACHE_T, 32, BLOCK_SIZE, NUM_THREADS);
     //   break;
     case 64:
-      LAUNCH_ATTENTION_KERNEL(T, 64, BLOCK_SIZE, NUM_THREADS);
+      LAUNCH_ATTENTION_KERNEL(T, CACHE_T, 64, BLOCK_SIZE, NUM_THREADS);
       break;
     case 80:
-      LAUNCH_ATTENTION_KERNEL(T, 80, BLOCK_SIZE, NUM_THREADS);
+      LAUNCH_ATTENTION_KERNEL(T, CACHE_T, 80, BLOCK_SIZE, NUM_THREADS);
       break;
     case 96:
-      LAUNCH_ATTENTION_KERNEL(T, 96, BLOCK_SIZE, NUM_THREADS);
+      LAUNCH_ATTENTION_KERNEL(T, CACHE_T, 96, BLOCK_SIZE, NUM_THREADS);
       break;
     case 112:
-      LAUNCH_ATTENTION_KERNEL(T, 112, BLOCK_SIZE, NUM_THREADS);
+      LAUNCH_ATTENTION_KERNEL(T, CACHE_T, 112, BLOCK_SIZE, NUM_THREADS);
       break;
     case 128:
-      LAUNCH_ATTENTION_KERNEL(T, 128, BLOCK_SIZE, NUM_THREADS);
+      LAUNCH_ATTENTION_KERNEL(T, CACHE_T, 128, BLOCK_SIZE, NUM_THREADS);
       break;
     // case 160:
-    //   LAUNCH_ATTENTION_KERNEL(T, 160, BLOCK_SIZE, NUM_THREADS);
+    //   LAUNCH_ATTENTION_KERNEL(T, CACHE_T, 160, BLOCK_SIZE, NUM_THREADS);
     //   break;
     // case 192:
-    //   LAUNCH_ATTENTION_KERNEL(T, 192, BLOCK_SIZE, NUM_THREADS);
+    //   LAUNCH_ATTENTION_KERNEL(T, CACHE_T, 192, BLOCK_SIZE, NUM_THREADS);
     //   break;
     case 256:
-      LAUNCH_ATTENTION_KERNEL(T, 256, BLOCK_SIZE, NUM_THREADS);
+      LAUNCH_ATTENTION_KERNEL(T, CACHE_T, 256, BLOCK_SIZE, NUM_THREADS);
       break;
     default:
       TORCH_CHECK(false, "Unsupported head size: ", head_size);
@@ -447,8 +469,8 @@ void single_query_cached_kv_attention_launcher(
   }
 }
 
-#define CALL_KERNEL_LAUNCHER(T, BLOCK_SIZE)                         \
-  single_query_cached_kv_attention_launcher<T, BLOCK_SIZE>(         \
+#define CALL_KERNEL_LAUNCHER(T, CACHE_T, BLOCK_SIZE)                  \
+  single_query_cached_kv_attention_launcher<T, CACHE_T, BLOCK_SIZE>(    \
     out,                                                            \
     query,                                                          \
     key_cache,                                                      \
@@ -462,34 +484,34 @@ void single_query_cached_kv_attention_launcher(
 
 // NOTE: To reduce the compilation time, we omitted block sizes
 // 1, 2, 4, 64, 128, 256.
-#define CALL_KERNEL_LAUNCHER_BLOCK_SIZE(T)                          \
+#define CALL_KERNEL_LAUNCHER_BLOCK_SIZE(T, CACHE_T)                 \
   switch (block_size) {                                             \
     /* case 1:                         */                           \
-    /*   CALL_KERNEL_LAUNCHER(T, 1);   */                           \
+    /*   CALL_KERNEL_LAUNCHER(T, CACHE_T, 1);   */                           \
     /*   break;                        */                           \
     /* case 2:                         */                           \
-    /*   CALL_KERNEL_LAUNCHER(T, 2);   */                           \
+    /*   CALL_KERNEL_LAUNCHER(T, CACHE_T, 2);   */                           \
     /*   break;                        */                           \
     /* case 4:                         */                           \
-    /*   CALL_KERNEL_LAUNCHER(T, 4);   */                           \
+    /*   CALL_KERNEL_LAUNCHER(T, CACHE_T, 4);   */                           \
     /*   break;                        */                           \
     case 8:                                                         \
-      CALL_KERNEL_LAUNCHER(T, 8);                                   \
+      CALL_KERNEL_LAUNCHER(T, CACHE_T, 8);                                   \
       break;                                                        \
     case 16:                                                        \
-      CALL_KERNEL_LAUNCHER(T, 16);                                  \
+      CALL_KERNEL_LAUNCHER(T, CACHE_T, 16);                                  \
       break;                                                        \
     case 32:                                                        \
-      CALL_KERNEL_LAUNCHER(T, 32);                                  \
+      CALL_KERNEL_LAUNCHER(T, CACHE_T, 32);                                  \
       break;                                                        \
     /* case 64:                        */                           \
-    /*   CALL_KERNEL_LAUNCHER(T, 64);  */                           \
+    /*   CALL_KERNEL_LAUNCHER(T, CACHE_T, 64);  */                           \
     /*   break;                        */                           \
     /* case 128:                       */                           \
-    /*   CALL_KERNEL_LAUNCHER(T, 128); */                           \
+    /*   CALL_KERNEL_LAUNCHER(T, CACHE_T, 128); */                           \
     /*   break;                        */                           \
     /* case 256:                       */                           \
-    /*   CALL_KERNEL_LAUNCHER(T, 256); */                           \
+    /*   CALL_KERNEL_LAUNCHER(T, CACHE_T, 256); */                           \
     /*   break;                        */                           \
     default:                                                        \
       TORCH_CHECK(false, "Unsupported block size: ", block_size);   \
@@ -508,14 +530,33 @@ void single_query_cached_kv_attention(
   int block_size,
   int max_context_len,
   const c10::optional<torch::Tensor>& alibi_slopes) {
-  if (query.dtype() == at::ScalarType::Float) {
-    CALL_KERNEL_LAUNCHER_BLOCK_SIZE(float);
-  } else if (query.dtype() == at::ScalarType::Half) {
-    CALL_KERNEL_LAUNCHER_BLOCK_SIZE(uint16_t);
-  } else if (query.dtype() == at::ScalarType::BFloat16) {
-    CALL_KERNEL_LAUNCHER_BLOCK_SIZE(__nv_bfloat16);
+  if (key_cache.dtype() == query.dtype()) {
+    if (query.dtype() == at::ScalarType::Float) {
+      CALL_KERNEL_LAUNCHER_BLOCK_SIZE(float, float);
+    } else if (query.dtype() == at::ScalarType::Half) {
+      CALL_KERNEL_LAUNCHER_BLOCK_SIZE(uint16_t, uint16_t);
+    } else if (query.dtype() == at::ScalarType::BFloat16) {
+      CALL_KERNEL_LAUNCHER_BLOCK_SIZE(__nv_bfloat16, __nv_bfloat16);
+    } else {
+      TORCH_CHECK(false, "Unsupported data type: ", query.dtype());
+    }
+  } else if (key_cache.dtype() == at::ScalarType::Byte) {
+    // FP8 E4M3 KV cache stored as raw bytes.
+#ifdef ENABLE_FP8_E4M3
+    if (query.dtype() == at::ScalarType::Float) {
+      CALL_KERNEL_LAUNCHER_BLOCK_SIZE(float, uint8_t);
+    } else if (query.dtype() == at::ScalarType::Half) {
+      CALL_KERNEL_LAUNCHER_BLOCK_SIZE(uint16_t, uint8_t);
+    } else if (query.dtype() == at::ScalarType::BFloat16) {
+      CALL_KERNEL_LAUNCHER_BLOCK_SIZE(__nv_bfloat16, uint8_t);
+    } else {
+      TORCH_CHECK(false, "Unsupported data type: ", query.dtype());
+    }
+#else
+    TORCH_CHECK(false, "The FP8 E4M3 KV cache requires CUDA 11.8 or higher.");
+#endif
   } else {
-    TORCH_CHECK(false, "Unsupported data type: ", query.dtype());
+    TORCH_CHECK(false, "Unsupported KV cache data type: ", key_cache.dtype());
   }
 }
 
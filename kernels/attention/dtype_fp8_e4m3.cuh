@@ -0,0 +1,197 @@
+#pragma once
+
+#include "attention_generic.cuh"
+#include "dtype_float32.cuh"
+#include "dtype_float16.cuh"
+#include "dtype_bfloat16.cuh"
+
+#include <stdint.h>
+
+// The FP8 conversion intrinsics require CUDA 11.8 or higher. On older
+// toolkits the FP8 KV cache is compiled out and requesting it fails with a
+// clear error at runtime.
+#if defined(__CUDACC_VER_MAJOR__) && \
+    (__CUDACC_VER_MAJOR__ > 11 ||    \
+     (__CUDACC_VER_MAJOR__ == 11 && __CUDACC_VER_MINOR__ >= 8))
+#define ENABLE_FP8_E4M3
+#endif
+
+#ifdef ENABLE_FP8_E4M3
+#include <cuda_fp8.h>
+#endif
+
+namespace aphrodite {
+
+// FP8 (E4M3) vector types for the KV cache. The elements are stored as raw
+// bytes; the conversion helpers below expand them to the compute dtype when
+// the cache is read and narrow them when the cache is written.
+template<>
+struct Vec<uint8_t, 1> {
+  using Type = uint8_t;
+};
+template<>
+struct Vec<uint8_t, 2> {
+  using Type = uint16_t;
+};
+template<>
+struct Vec<uint8_t, 4> {
+  using Type = uint32_t;
+};
+template<>
+struct Vec<uint8_t, 8> {
+  using Type = uint2;
+};
+
+namespace fp8_e4m3 {
+
+template<typename Tout, typename Tin>
+__inline__ __device__ Tout vec_conversion(const Tin& x);
+
+#ifdef ENABLE_FP8_E4M3
+
+// fp8 -> half
+template<>
+__inline__ __device__ uint16_t vec_conversion<uint16_t, uint8_t>(const uint8_t& a) {
+  __half_raw res = __nv_cvt_fp8_to_halfraw(a, __NV_E4M3);
+  return res.x;
+}
+
+// fp8x2 -> half2
+template<>
+__inline__ __device__ uint32_t vec_conversion<uint32_t, uint16_t>(const uint16_t& a) {
+  union {
+    uint16_t u16[2];
+    uint32_t u32;
+  } tmp;
+  __half2_raw res = __nv_cvt_fp8x2_to_halfraw2(a, __NV_E4M3);
+  tmp.u16[0] = res.x;
+  tmp.u16[1] = res.y;
+  return tmp.u32;
+}
+
+// fp8x4 -> half2x2
+template<>
+__inline__ __device__ uint2 vec_conversion<uint2, uint32_t>(const uint32_t& a) {
+  union {
+    uint2 u32x2;
+    uint32_t u32[2];
+  } tmp;
+  tmp.u32[0] = vec_conversion<uint32_t, uint16_t>((uint16_t)a);
+  tmp.u32[1] = vec_conversion<uint32_t, uint16_t>((uint16_t)(a >> 16U));
+  return tmp.u32x2;
+}
+
+// fp8x8 -> half2x4
+template<>
+__inline__ __device__ uint4 vec_conversion<uint4, uint2>(const uint2& a) {
+  union {
+    uint4 u64x2;
+    uint2 u64[2];
+  } tmp;
+  tmp.u64[0] = vec_conversion<uint2, uint32_t>(a.x);
+  tmp.u64[1] = vec_conversion<uint2, uint32_t>(a.y);
+  return tmp.u64x2;
+}
+
+// fp8 -> __nv_bfloat16
+template<>
+__inline__ __device__ __nv_bfloat16 vec_conversion<__nv_bfloat16, uint8_t>(const uint8_t& a) {
+  // Note there is no direct convert function from fp8 to bf16.
+  __half_raw res = __nv_cvt_fp8_to_halfraw(a, __NV_E4M3);
+  return __float2bfloat16(half_to_float(res.x));
+}
+
+// fp8x2 -> __nv_bfloat162
+template<>
+__inline__ __device__ __nv_bfloat162 vec_conversion<__nv_bfloat162, uint16_t>(const uint16_t& a) {
+  __nv_bfloat162 res;
+  res.x = vec_conversion<__nv_bfloat16, uint8_t>((uint8_t)a);
+  res.y = vec_conversion<__nv_bfloat16, uint8_t>((uint8_t)(a >> 8U));
+  return res;
+}
+
+// fp8x4 -> bf16_4_t
+template<>
+__inline__ __device__ bf16_4_t vec_conversion<bf16_4_t, uint32_t>(const uint32_t& a) {
+  bf16_4_t res;
+  res.x = vec_conversion<__nv_bfloat162, uint16_t>((uint16_t)a);
+  res.y = vec_conversion<__nv_bfloat162, uint16_t>((uint16_t)(a >> 16U));
+  return res;
+}
+
+// fp8x8 -> bf16_8_t
+template<>
+__inline__ __device__ bf16_8_t vec_conversion<bf16_8_t, uint2>(const uint2& a) {
+  bf16_4_t tmp1, tmp2;
+  tmp1 = vec_conversion<bf16_4_t, uint32_t>(a.x);
+  tmp2 = vec_conversion<bf16_4_t, uint32_t>(a.y);
+  bf16_8_t res;
+  res.x = tmp1.x;
+  res.y = tmp1.y;
+  res.z = tmp2.x;
+  res.w = tmp2.y;
+  return res;
+}
+
+// fp8 -> float
+template<>
+__inline__ __device__ float vec_conversion<float, uint8_t>(const uint8_t& a) {
+  __half_raw res = __nv_cvt_fp8_to_halfraw(a, __NV_E4M3);
+  return half_to_float(res.x);
+}
+
+// fp8x2 -> float2
+template<>
+__inline__ __device__ float2 vec_conversion<float2, uint16_t>(const uint16_t& a) {
+  uint32_t tmp = vec_conversion<uint32_t, uint16_t>(a);
+  return half2_to_float2(tmp);
+}
+
+// fp8x4 -> float4
+template<>
+__inline__ __device__ float4 vec_conversion<float4, uint32_t>(const uint32_t& a) {
+  float2 lo = vec_conversion<float2, uint16_t>((uint16_t)a);
+  float2 hi = vec_conversion<float2, uint16_t>((uint16_t)(a >> 16U));
+  return make_float4(lo.x, lo.y, hi.x, hi.y);
+}
+
+// fp8x8 -> float8
+template<>
+__inline__ __device__ Float8_ vec_conversion<Float8_, uint2>(const uint2& a) {
+  float4 tmp1 = vec_conversion<float4, uint32_t>(a.x);
+  float4 tmp2 = vec_conversion<float4, uint32_t>(a.y);
+  Float8_ res;
+  res.x = make_float2(tmp1.x, tmp1.y);
+  res.y = make_float2(tmp1.z, tmp1.w);
+  res.z = make_float2(tmp2.x, tmp2.y);
+  res.w = make_float2(tmp2.z, tmp2.w);
+  return res;
+}
+
+// half -> fp8
+template<>
+__inline__ __device__ uint8_t vec_conversion<uint8_t, uint16_t>(const uint16_t& a) {
+  __half_raw tmp;
+  tmp.x = a;
+  __nv_fp8_storage_t res = __nv_cvt_halfraw_to_fp8(tmp, __NV_SATFINITE, __NV_E4M3);
+  return (uint8_t)res;
+}
+
+// __nv_bfloat16 -> fp8
+template<>
+__inline__ __device__ uint8_t vec_conversion<uint8_t, __nv_bfloat16>(const __nv_bfloat16& a) {
+  __nv_fp8_storage_t res = __nv_cvt_float_to_fp8(__bfloat162float(a), __NV_SATFINITE, __NV_E4M3);
+  return (uint8_t)res;
+}
+
+// float -> fp8
+template<>
+__inline__ __device__ uint8_t vec_conversion<uint8_t, float>(const float& a) {
+  __nv_fp8_storage_t res = __nv_cvt_float_to_fp8(a, __NV_SATFINITE, __NV_E4M3);
+  return (uint8_t)res;
+}
+
+#endif // ENABLE_FP8_E4M3
+} // namespace fp8_e4m3
+
+} // namespace aphrodite
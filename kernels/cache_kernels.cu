@@ -2,10 +2,12 @@
 #include <ATen/cuda/CUDAContext.h>
 
 #include "dispatch_utils.h"
+#include "attention/dtype_fp8_e4m3.cuh"
 
 #include <algorithm>
 #include <cassert>
 #include <map>
+#include <type_traits>
 #include <vector>
 
 void swap_blocks(
@@ -127,7 +129,7 @@ void copy_blocks(
   dim3 grid(num_layers, num_pairs);
   dim3 block(std::min(1024, numel_per_block));
   const cudaStream_t stream = at::cuda::getCurrentCUDAStream();
-  APHRODITE_DISPATCH_FLOATING_TYPES(
+  APHRODITE_DISPATCH_FLOATING_AND_BYTE_TYPES(
     key_caches[0].scalar_type(), "copy_blocks_kernel", ([&] {
       aphrodite::copy_blocks_kernel<scalar_t><<<grid, block, 0, stream>>>(
         key_cache_ptrs_tensor.data_ptr<int64_t>(),
@@ -139,12 +141,12 @@ void copy_blocks(
 
 namespace aphrodite {
 
-template<typename scalar_t>
+template<typename scalar_t, typename cache_t>
 __global__ void reshape_and_cache_kernel(
   const scalar_t* __restrict__ key,     // [num_tokens, num_heads, head_size]
   const scalar_t* __restrict__ value,   // [num_tokens, num_heads, head_size]
-  scalar_t* __restrict__ key_cache,     // [num_blocks, num_heads, head_size/x, block_size, x]
-  scalar_t* __restrict__ value_cache,   // [num_blocks, num_heads, head_size, block_size]
+  cache_t* __restrict__ key_cache,      // [num_blocks, num_heads, head_size/x, block_size, x]
+  cache_t* __restrict__ value_cache,    // [num_blocks, num_heads, head_size, block_size]
   const int* __restrict__ slot_mapping, // [num_tokens]
   const int key_stride,
   const int value_stride,
@@ -176,8 +178,16 @@ __global__ void reshape_and_cache_kernel(
                               + head_idx * head_size * block_size
                               + head_offset * block_size
                               + block_offset;
-    key_cache[tgt_key_idx] = __ldg(&key[src_key_idx]);
-    value_cache[tgt_value_idx] = __ldg(&value[src_value_idx]);
+    if constexpr (std::is_same<scalar_t, cache_t>::value) {
+      key_cache[tgt_key_idx] = __ldg(&key[src_key_idx]);
+      value_cache[tgt_value_idx] = __ldg(&value[src_value_idx]);
+    } else {
+      // FP8 E4M3 KV cache: narrow to a byte on the way in.
+      key_cache[tgt_key_idx] =
+        fp8_e4m3::vec_conversion<uint8_t, float>((float) key[src_key_idx]);
+      value_cache[tgt_value_idx] =
+        fp8_e4m3::vec_conversion<uint8_t, float>((float) value[src_value_idx]);
+    }
   }
 }
 
@@ -202,23 +212,50 @@ void reshape_and_cache(
   dim3 grid(num_tokens);
   dim3 block(std::min(num_heads * head_size, 512));
   const cudaStream_t stream = at::cuda::getCurrentCUDAStream();
-  APHRODITE_DISPATCH_FLOATING_TYPES(
-    key.scalar_type(),
-    "reshape_and_cache_kernel",
-    [&] {
-      aphrodite::reshape_and_cache_kernel<scalar_t><<<grid, block, 0, stream>>>(
-        key.data_ptr<scalar_t>(),
-        value.data_ptr<scalar_t>(),
-        key_cache.data_ptr<scalar_t>(),
-        value_cache.data_ptr<scalar_t>(),
-        slot_mapping.data_ptr<int>(),
-        key_stride,
-        value_stride,
-        num_heads,
-        head_size,
-        block_size,
-        x);
-    });
+  if (key_cache.dtype() == key.dtype()) {
+    APHRODITE_DISPATCH_FLOATING_TYPES(
+      key.scalar_type(),
+      "reshape_and_cache_kernel",
+      [&] {
+        aphrodite::reshape_and_cache_kernel<scalar_t, scalar_t><<<grid, block, 0, stream>>>(
+          key.data_ptr<scalar_t>(),
+          value.data_ptr<scalar_t>(),
+          key_cache.data_ptr<scalar_t>(),
+          value_cache.data_ptr<scalar_t>(),
+          slot_mapping.data_ptr<int>(),
+          key_stride,
+          value_stride,
+          num_heads,
+          head_size,
+          block_size,
+          x);
+      });
+  } else if (key_cache.dtype() == at::ScalarType::Byte) {
+    // FP8 E4M3 KV cache stored as raw bytes.
+#ifdef ENABLE_FP8_E4M3
+    APHRODITE_DISPATCH_FLOATING_TYPES(
+      key.scalar_type(),
+      "reshape_and_cache_kernel",
+      [&] {
+        aphrodite::reshape_and_cache_kernel<scalar_t, uint8_t><<<grid, block, 0, stream>>>(
+          key.data_ptr<scalar_t>(),
+          value.data_ptr<scalar_t>(),
+          key_cache.data_ptr<uint8_t>(),
+          value_cache.data_ptr<uint8_t>(),
+          slot_mapping.data_ptr<int>(),
+          key_stride,
+          value_stride,
+          num_heads,
+          head_size,
+          block_size,
+          x);
+      });
+#else
+    TORCH_CHECK(false, "The FP8 E4M3 KV cache requires CUDA 11.8 or higher.");
+#endif
+  } else {
+    TORCH_CHECK(false, "Unsupported KV cache data type: ", key_cache.dtype());
+  }
 }
 
 namespace aphrodite {
@@ -359,6 +396,10 @@ void gather_cached_kv(
   int key_stride = key.stride(0);
   int value_stride = value.stride(0);
 
+  // The sliding-window prompt path does not dequantize on gather.
+  TORCH_CHECK(key_cache.dtype() == key.dtype(),
+              "gather_cached_kv does not support the FP8 E4M3 KV cache");
+
   dim3 grid(num_tokens);
   dim3 block(std::min(num_heads * head_size, 512));
   const cudaStream_t stream = at::cuda::getCurrentCUDAStream();
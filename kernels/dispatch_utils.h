@@ -11,4 +11,13 @@
 
 #define APHRODITE_DISPATCH_FLOATING_TYPES(TYPE, NAME, ...)             \
   AT_DISPATCH_SWITCH(                                             \
-    TYPE, NAME, APHRODITE_DISPATCH_CASE_FLOATING_TYPES(__VA_ARGS__))
\ No newline at end of file
+    TYPE, NAME, APHRODITE_DISPATCH_CASE_FLOATING_TYPES(__VA_ARGS__))
+
+// Byte is included for the FP8 E4M3 KV cache, which is stored as uint8.
+#define APHRODITE_DISPATCH_CASE_FLOATING_AND_BYTE_TYPES(...)      \
+  APHRODITE_DISPATCH_CASE_FLOATING_TYPES(__VA_ARGS__)             \
+  AT_DISPATCH_CASE(at::ScalarType::Byte, __VA_ARGS__)
+
+#define APHRODITE_DISPATCH_FLOATING_AND_BYTE_TYPES(TYPE, NAME, ...)    \
+  AT_DISPATCH_SWITCH(                                             \
+    TYPE, NAME, APHRODITE_DISPATCH_CASE_FLOATING_AND_BYTE_TYPES(__VA_ARGS__))
\ No newline at end of file
@@ -6,9 +6,34 @@ void rms_norm(
   torch::Tensor& weight,
   float epsilon);
 
+void layer_norm(
+  torch::Tensor& out,
+  torch::Tensor& input,
+  torch::Tensor& weight,
+  torch::Tensor& bias,
+  float epsilon);
+
+void fused_add_layer_norm(
+  torch::Tensor& out,
+  torch::Tensor& sum_out,
+  torch::Tensor& x,
+  const c10::optional<torch::Tensor>& y,
+  torch::Tensor& residual,
+  torch::Tensor& weight,
+  torch::Tensor& bias,
+  float epsilon);
+
 PYBIND11_MODULE(TORCH_EXTENSION_NAME, m) {
   m.def(
     "rms_norm",
     &rms_norm,
     "Apply Root Mean Square (RMS) Normalization to the input tensor.");
+  m.def(
+    "layer_norm",
+    &layer_norm,
+    "Apply Layer Normalization to the input tensor in a single pass.");
+  m.def(
+    "fused_add_layer_norm",
+    &fused_add_layer_norm,
+    "Add branch output(s) and a residual and apply Layer Normalization.");
 }
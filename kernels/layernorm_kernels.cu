@@ -34,6 +34,101 @@ __global__ void rms_norm_kernel(
   }
 }
 
+// LayerNorm with the mean and variance computed in one pass over the input
+// (via E[x^2] - E[x]^2), instead of the separate mean and variance
+// reductions of the eager implementation.
+template<typename scalar_t>
+__global__ void layer_norm_kernel(
+  scalar_t* __restrict__ out,             // [num_tokens, hidden_size]
+  const scalar_t* __restrict__ input,     // [num_tokens, hidden_size]
+  const scalar_t* __restrict__ weight,    // [hidden_size]
+  const scalar_t* __restrict__ bias,      // [hidden_size]
+  const float epsilon,
+  const int num_tokens,
+  const int hidden_size) {
+  __shared__ float s_mean;
+  __shared__ float s_inv_std;
+  float sum = 0.0f;
+  float sum_sq = 0.0f;
+
+  for (int idx = threadIdx.x; idx < hidden_size; idx += blockDim.x) {
+    const float x = (float) input[blockIdx.x * hidden_size + idx];
+    sum += x;
+    sum_sq += x * x;
+  }
+  sum = blockReduceSum<float>(sum);
+  // blockReduceSum reuses its static shared memory; do not start the second
+  // reduction before every thread has read the result of the first.
+  __syncthreads();
+  sum_sq = blockReduceSum<float>(sum_sq);
+  if (threadIdx.x == 0) {
+    const float mean = sum / hidden_size;
+    s_mean = mean;
+    s_inv_std = rsqrtf(sum_sq / hidden_size - mean * mean + epsilon);
+  }
+  __syncthreads();
+
+  for (int idx = threadIdx.x; idx < hidden_size; idx += blockDim.x) {
+    const float x = (float) input[blockIdx.x * hidden_size + idx];
+    out[blockIdx.x * hidden_size + idx] =
+      (scalar_t) ((x - s_mean) * s_inv_std * (float) weight[idx]
+                  + (float) bias[idx]);
+  }
+}
+
+// Fuses the GPT-J style parallel-residual sum with the LayerNorm of the
+// following block: z = x [+ y] + residual, out = LayerNorm(z). The sum is
+// written out so that it can serve as the residual of the next layer. This
+// reads the hidden state once instead of the passes the unfused
+// add(s) + LayerNorm sequence would make. y may be null when the branch
+// outputs were already summed (e.g. before a merged all-reduce).
+template<typename scalar_t>
+__global__ void fused_add_layer_norm_kernel(
+  scalar_t* __restrict__ out,             // [num_tokens, hidden_size]
+  scalar_t* __restrict__ sum_out,         // [num_tokens, hidden_size]
+  const scalar_t* __restrict__ x,         // [num_tokens, hidden_size]
+  const scalar_t* __restrict__ y,         // [num_tokens, hidden_size] or nullptr
+  const scalar_t* __restrict__ residual,  // [num_tokens, hidden_size]
+  const scalar_t* __restrict__ weight,    // [hidden_size]
+  const scalar_t* __restrict__ bias,      // [hidden_size]
+  const float epsilon,
+  const int num_tokens,
+  const int hidden_size) {
+  __shared__ float s_mean;
+  __shared__ float s_inv_std;
+  float sum = 0.0f;
+  float sum_sq = 0.0f;
+
+  for (int idx = threadIdx.x; idx < hidden_size; idx += blockDim.x) {
+    const int i = blockIdx.x * hidden_size + idx;
+    float z = (float) x[i] + (float) residual[i];
+    if (y != nullptr) {
+      z += (float) y[i];
+    }
+    sum_out[i] = (scalar_t) z;
+    sum += z;
+    sum_sq += z * z;
+  }
+  sum = blockReduceSum<float>(sum);
+  // blockReduceSum reuses its static shared memory; do not start the second
+  // reduction before every thread has read the result of the first.
+  __syncthreads();
+  sum_sq = blockReduceSum<float>(sum_sq);
+  if (threadIdx.x == 0) {
+    const float mean = sum / hidden_size;
+    s_mean = mean;
+    s_inv_std = rsqrtf(sum_sq / hidden_size - mean * mean + epsilon);
+  }
+  __syncthreads();
+
+  for (int idx = threadIdx.x; idx < hidden_size; idx += blockDim.x) {
+    const int i = blockIdx.x * hidden_size + idx;
+    const float z = (float) sum_out[i];
+    out[i] = (scalar_t) ((z - s_mean) * s_inv_std * (float) weight[idx]
+                         + (float) bias[idx]);
+  }
+}
+
 } // namespace aphrodite
 
 void rms_norm(
@@ -59,4 +154,64 @@ void rms_norm(
         num_tokens,
         hidden_size);
     });
+}
+
+void layer_norm(
+  torch::Tensor& out,      // [num_tokens, hidden_size]
+  torch::Tensor& input,    // [num_tokens, hidden_size]
+  torch::Tensor& weight,   // [hidden_size]
+  torch::Tensor& bias,     // [hidden_size]
+  float epsilon) {
+  int num_tokens = input.size(0);
+  int hidden_size = input.size(1);
+
+  dim3 grid(num_tokens);
+  dim3 block(std::min(hidden_size, 1024));
+  const cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  APHRODITE_DISPATCH_FLOATING_TYPES(
+    input.scalar_type(),
+    "layer_norm_kernel",
+    [&] {
+      aphrodite::layer_norm_kernel<scalar_t><<<grid, block, 0, stream>>>(
+        out.data_ptr<scalar_t>(),
+        input.data_ptr<scalar_t>(),
+        weight.data_ptr<scalar_t>(),
+        bias.data_ptr<scalar_t>(),
+        epsilon,
+        num_tokens,
+        hidden_size);
+    });
+}
+
+void fused_add_layer_norm(
+  torch::Tensor& out,      // [num_tokens, hidden_size]
+  torch::Tensor& sum_out,  // [num_tokens, hidden_size]
+  torch::Tensor& x,        // [num_tokens, hidden_size]
+  const c10::optional<torch::Tensor>& y,  // [num_tokens, hidden_size]
+  torch::Tensor& residual, // [num_tokens, hidden_size]
+  torch::Tensor& weight,   // [hidden_size]
+  torch::Tensor& bias,     // [hidden_size]
+  float epsilon) {
+  int num_tokens = x.size(0);
+  int hidden_size = x.size(1);
+
+  dim3 grid(num_tokens);
+  dim3 block(std::min(hidden_size, 1024));
+  const cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+  APHRODITE_DISPATCH_FLOATING_TYPES(
+    x.scalar_type(),
+    "fused_add_layer_norm_kernel",
+    [&] {
+      aphrodite::fused_add_layer_norm_kernel<scalar_t><<<grid, block, 0, stream>>>(
+        out.data_ptr<scalar_t>(),
+        sum_out.data_ptr<scalar_t>(),
+        x.data_ptr<scalar_t>(),
+        y ? y->data_ptr<scalar_t>() : nullptr,
+        residual.data_ptr<scalar_t>(),
+        weight.data_ptr<scalar_t>(),
+        bias.data_ptr<scalar_t>(),
+        epsilon,
+        num_tokens,
+        hidden_size);
+    });
 }
\ No newline at end of file
@@ -8,9 +8,24 @@ void rotary_embedding(
   torch::Tensor& cos_sin_cache,
   bool is_neox);
 
+void rotary_embedding_and_cache(
+  torch::Tensor& positions,
+  torch::Tensor& query,
+  torch::Tensor& key,
+  torch::Tensor& value,
+  torch::Tensor& cos_sin_cache,
+  bool is_neox,
+  torch::Tensor& key_cache,
+  torch::Tensor& value_cache,
+  torch::Tensor& slot_mapping);
+
 PYBIND11_MODULE(TORCH_EXTENSION_NAME, m) {
   m.def(
     "rotary_embedding",
     &rotary_embedding,
     "Apply GPT-NeoX or GPT-J style rotary embedding to query and key");
+  m.def(
+    "rotary_embedding_and_cache",
+    &rotary_embedding_and_cache,
+    "Apply rotary embedding to query and key and cache the key and value");
 }
\ No newline at end of file
@@ -2,6 +2,9 @@
 #include <ATen/cuda/CUDAContext.h>
 
 #include "dispatch_utils.h"
+#include "attention/dtype_fp8_e4m3.cuh"
+
+#include <type_traits>
 
 namespace aphrodite {
 
@@ -75,6 +78,101 @@ __global__ void rotary_embedding_kernel(
   }
 }
 
+template<typename scalar_t, typename cache_t, bool IS_NEOX>
+__global__ void rotary_embedding_and_cache_kernel(
+  const int64_t* __restrict__ positions,        // [num_tokens]
+  scalar_t* __restrict__ query,                 // [num_tokens, num_heads, head_size]
+  const scalar_t* __restrict__ key,             // [num_tokens, num_kv_heads, head_size]
+  const scalar_t* __restrict__ value,           // [num_tokens, num_kv_heads, head_size]
+  const scalar_t* __restrict__ cos_sin_cache,   // [max_position, 2, rot_dim // 2]
+  cache_t* __restrict__ key_cache,              // [num_blocks, num_kv_heads, head_size/x, block_size, x]
+  cache_t* __restrict__ value_cache,            // [num_blocks, num_kv_heads, head_size, block_size]
+  const int* __restrict__ slot_mapping,         // [num_tokens]
+  const int rot_dim,
+  const int query_stride,
+  const int key_stride,
+  const int value_stride,
+  const int num_heads,
+  const int num_kv_heads,
+  const int head_size,
+  const int block_size,
+  const int x) {
+  // Each thread block is responsible for one token.
+  const int token_idx = blockIdx.x;
+  int64_t pos = positions[token_idx];
+  const scalar_t* cache_ptr = cos_sin_cache + pos * rot_dim;
+
+  const int embed_dim = rot_dim / 2;
+  const scalar_t* cos_ptr = cache_ptr;
+  const scalar_t* sin_ptr = cache_ptr + embed_dim;
+
+  // Rotate the query in place.
+  const int nq = num_heads * embed_dim;
+  for (int i = threadIdx.x; i < nq; i += blockDim.x) {
+    const int head_idx = i / embed_dim;
+    const int token_head = token_idx * query_stride + head_idx * head_size;
+    const int rot_offset = i % embed_dim;
+    apply_rotary_embedding<scalar_t, IS_NEOX>(query + token_head, cos_ptr,
+                                              sin_ptr, rot_offset, embed_dim);
+  }
+
+  // Rotate the key in registers and stream it to the cache together with the
+  // value. The rotated key is only written to the cache, not back to the key
+  // tensor, so this kernel must only be used when the key is subsequently
+  // read from the cache (i.e., the decoding phase).
+  const int slot_idx = slot_mapping[token_idx];
+  const int block_idx = slot_idx / block_size;
+  const int block_offset = slot_idx % block_size;
+  const int nk = num_kv_heads * head_size;
+  for (int i = threadIdx.x; i < nk; i += blockDim.x) {
+    const int head_idx = i / head_size;
+    const int head_offset = i % head_size;
+
+    scalar_t k = __ldg(&key[token_idx * key_stride + i]);
+    if (head_offset < rot_dim) {
+      const scalar_t* key_head = key + token_idx * key_stride
+                                     + head_idx * head_size;
+      int rot_offset;
+      bool is_y;
+      if (IS_NEOX) {
+        is_y = head_offset >= embed_dim;
+        rot_offset = is_y ? head_offset - embed_dim : head_offset;
+      } else {
+        is_y = head_offset & 1;
+        rot_offset = head_offset / 2;
+      }
+      const int x_index = IS_NEOX ? rot_offset : 2 * rot_offset;
+      const int y_index = IS_NEOX ? rot_offset + embed_dim : 2 * rot_offset + 1;
+      const scalar_t cos = __ldg(cos_ptr + rot_offset);
+      const scalar_t sin = __ldg(sin_ptr + rot_offset);
+      const scalar_t kx = __ldg(key_head + x_index);
+      const scalar_t ky = __ldg(key_head + y_index);
+      k = is_y ? ky * cos + kx * sin : kx * cos - ky * sin;
+    }
+
+    const int x_idx = head_offset / x;
+    const int x_offset = head_offset % x;
+    const int tgt_key_idx = block_idx * num_kv_heads * (head_size / x) * block_size * x
+                            + head_idx * (head_size / x) * block_size * x
+                            + x_idx * block_size * x
+                            + block_offset * x
+                            + x_offset;
+    const int tgt_value_idx = block_idx * num_kv_heads * head_size * block_size
+                              + head_idx * head_size * block_size
+                              + head_offset * block_size
+                              + block_offset;
+    if constexpr (std::is_same<scalar_t, cache_t>::value) {
+      key_cache[tgt_key_idx] = k;
+      value_cache[tgt_value_idx] = __ldg(&value[token_idx * value_stride + i]);
+    } else {
+      // FP8 E4M3 KV cache: narrow to a byte on the way in.
+      key_cache[tgt_key_idx] = fp8_e4m3::vec_conversion<uint8_t, float>((float) k);
+      value_cache[tgt_value_idx] = fp8_e4m3::vec_conversion<uint8_t, float>(
+        (float) value[token_idx * value_stride + i]);
+    }
+  }
+}
+
 } // namespace aphrodite
 
 void rotary_embedding(
@@ -124,4 +222,82 @@ void rotary_embedding(
           head_size);
       }
     });
-}
\ No newline at end of file
+}
+void rotary_embedding_and_cache(
+  torch::Tensor& positions,         // [num_tokens]
+  torch::Tensor& query,             // [num_tokens, num_heads, head_size]
+  torch::Tensor& key,               // [num_tokens, num_kv_heads, head_size]
+  torch::Tensor& value,             // [num_tokens, num_kv_heads, head_size]
+  torch::Tensor& cos_sin_cache,     // [max_position, rot_dim]
+  bool is_neox,
+  torch::Tensor& key_cache,         // [num_blocks, num_kv_heads, head_size/x, block_size, x]
+  torch::Tensor& value_cache,       // [num_blocks, num_kv_heads, head_size, block_size]
+  torch::Tensor& slot_mapping) {    // [num_tokens]
+  int num_tokens = query.size(0);
+  int rot_dim = cos_sin_cache.size(1);
+  int num_heads = query.size(1);
+  int num_kv_heads = key.size(1);
+  int head_size = key.size(2);
+  int block_size = key_cache.size(3);
+  int x = key_cache.size(4);
+  int query_stride = query.stride(0);
+  int key_stride = key.stride(0);
+  int value_stride = value.stride(0);
+
+  dim3 grid(num_tokens);
+  dim3 block(std::min(num_kv_heads * head_size, 512));
+  const cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+
+#define LAUNCH_ROTARY_EMBEDDING_AND_CACHE(CACHE_T, IS_NEOX)                       \
+  aphrodite::rotary_embedding_and_cache_kernel<scalar_t, CACHE_T, IS_NEOX>        \
+  <<<grid, block, 0, stream>>>(                                                   \
+    positions.data_ptr<int64_t>(),                                                \
+    query.data_ptr<scalar_t>(),                                                   \
+    key.data_ptr<scalar_t>(),                                                     \
+    value.data_ptr<scalar_t>(),                                                   \
+    cos_sin_cache.data_ptr<scalar_t>(),                                           \
+    key_cache.data_ptr<CACHE_T>(),                                                \
+    value_cache.data_ptr<CACHE_T>(),                                              \
+    slot_mapping.data_ptr<int>(),                                                 \
+    rot_dim,                                                                      \
+    query_stride,                                                                 \
+    key_stride,                                                                   \
+    value_stride,                                                                 \
+    num_heads,                                                                    \
+    num_kv_heads,                                                                 \
+    head_size,                                                                    \
+    block_size,                                                                   \
+    x);
+
+  if (key_cache.dtype() == key.dtype()) {
+    APHRODITE_DISPATCH_FLOATING_TYPES(
+      query.scalar_type(),
+      "rotary_embedding_and_cache",
+      [&] {
+        if (is_neox) {
+          LAUNCH_ROTARY_EMBEDDING_AND_CACHE(scalar_t, true);
+        } else {
+          LAUNCH_ROTARY_EMBEDDING_AND_CACHE(scalar_t, false);
+        }
+      });
+  } else if (key_cache.dtype() == at::ScalarType::Byte) {
+    // FP8 E4M3 KV cache stored as raw bytes.
+#ifdef ENABLE_FP8_E4M3
+    APHRODITE_DISPATCH_FLOATING_TYPES(
+      query.scalar_type(),
+      "rotary_embedding_and_cache",
+      [&] {
+        if (is_neox) {
+          LAUNCH_ROTARY_EMBEDDING_AND_CACHE(uint8_t, true);
+        } else {
+          LAUNCH_ROTARY_EMBEDDING_AND_CACHE(uint8_t, false);
+        }
+      });
+#else
+    TORCH_CHECK(false, "The FP8 E4M3 KV cache requires CUDA 11.8 or higher.");
+#endif
+  } else {
+    TORCH_CHECK(false, "Unsupported KV cache data type: ", key_cache.dtype());
+  }
+#undef LAUNCH_ROTARY_EMBEDDING_AND_CACHE
+}
@@ -4,6 +4,39 @@ import pytest
 import torch
 
 
+def random_fp8_e4m3_bytes(shape: Tuple[int, ...]) -> torch.Tensor:
+    """Create random FP8 E4M3 bytes with small exponents.
+
+    The exponent field is capped so the decoded magnitudes stay below 2
+    and the NaN encodings (0x7F and 0xFF) cannot be generated.
+    """
+    sign = torch.randint(0, 2, shape, dtype=torch.uint8, device='cuda')
+    exponent = torch.randint(0, 8, shape, dtype=torch.uint8, device='cuda')
+    mantissa = torch.randint(0, 8, shape, dtype=torch.uint8, device='cuda')
+    return (sign << 7) | (exponent << 3) | mantissa
+
+
+def dequantize_fp8_e4m3(t: torch.Tensor) -> torch.Tensor:
+    """Decode an FP8 E4M3 (uint8-backed) tensor to float32.
+
+    E4M3 has one sign bit, a 4-bit exponent with bias 7 and a 3-bit
+    mantissa; a zero exponent encodes subnormals and 0x7F/0xFF encode NaN.
+    The decoding is exact, so the result can serve as a reference for the
+    CUDA-side conversion.
+    """
+    assert t.dtype == torch.uint8
+    bits = t.to(torch.int32)
+    sign = 1.0 - 2.0 * ((bits >> 7) & 1).float()
+    exponent = ((bits >> 3) & 0xF).float()
+    mantissa = (bits & 0x7).float()
+    magnitude = torch.where(exponent == 0, mantissa * 2.0**-9,
+                            (1.0 + mantissa / 8.0) *
+                            torch.pow(2.0, exponent - 7.0))
+    value = sign * magnitude
+    nan = torch.full_like(value, float('nan'))
+    return torch.where((bits & 0x7F) == 0x7F, nan, value)
+
+
 def create_kv_caches(
         num_blocks: int,
         block_size: int,
@@ -21,22 +54,33 @@ def create_kv_caches(
     key_cache_shape = (num_blocks, num_heads, head_size // x, block_size, x)
     key_caches = []
     for _ in range(num_layers):
-        key_cache = torch.empty(size=key_cache_shape,
-                                dtype=dtype,
-                                device='cuda')
-        key_cache.uniform_(-scale, scale)
+        if dtype == torch.uint8:
+            # An FP8 E4M3 cache is backed by uint8.
+            key_cache = random_fp8_e4m3_bytes(key_cache_shape)
+        else:
+            key_cache = torch.empty(size=key_cache_shape,
+                                    dtype=dtype,
+                                    device='cuda')
+            key_cache.uniform_(-scale, scale)
         key_caches.append(key_cache)
 
     value_cache_shape = (num_blocks, num_heads, head_size, block_size)
     values_caches = []
     for _ in range(num_layers):
-        values_cache = torch.empty(size=value_cache_shape,
-                                   dtype=dtype,
-                                   device='cuda')
-        values_cache.uniform_(-scale, scale)
+        if dtype == torch.uint8:
+            values_cache = random_fp8_e4m3_bytes(value_cache_shape)
+        else:
+            values_cache = torch.empty(size=value_cache_shape,
+                                       dtype=dtype,
+                                       device='cuda')
+            values_cache.uniform_(-scale, scale)
         values_caches.append(values_cache)
     return key_caches, values_caches
 
 @pytest.fixture()
 def kv_cache_factory():
-    return create_kv_caches
\ No newline at end of file
+    return create_kv_caches
+
+@pytest.fixture()
+def fp8_dequantizer():
+    return dequantize_fp8_e4m3
\ No newline at end of file
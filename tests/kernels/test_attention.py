@@ -191,6 +191,121 @@ def test_single_query_cached_kv_attention(
     assert torch.allclose(output, ref_output, atol=1e-3, rtol=1e-5)
 
 
+@pytest.mark.parametrize("num_seqs", NUM_GEN_SEQS)
+@pytest.mark.parametrize("num_heads", NUM_HEADS)
+@pytest.mark.parametrize("head_size", HEAD_SIZES)
+@pytest.mark.parametrize("block_size", BLOCK_SIZES)
+@pytest.mark.parametrize("dtype", DTYPES)
+@pytest.mark.parametrize("seed", SEEDS)
+@torch.inference_mode()
+def test_single_query_cached_kv_attention_fp8(
+    kv_cache_factory,
+    fp8_dequantizer,
+    num_seqs: int,
+    num_heads: Tuple[int, int],
+    head_size: int,
+    block_size: int,
+    dtype: torch.dtype,
+    seed: int,
+) -> None:
+    random.seed(seed)
+    torch.random.manual_seed(seed)
+    torch.cuda.manual_seed(seed)
+
+    scale = float(1.0 / (head_size**0.5))
+    num_query_heads, num_kv_heads = num_heads
+    query = torch.empty(num_seqs,
+                        num_query_heads,
+                        head_size,
+                        dtype=dtype,
+                        device="cuda")
+    query.uniform_(-scale, scale)
+
+    assert num_query_heads % num_kv_heads == 0
+    num_queries_per_kv = num_query_heads // num_kv_heads
+    head_mapping = torch.repeat_interleave(
+        torch.arange(num_kv_heads, dtype=torch.int32, device="cuda"),
+        num_queries_per_kv)
+
+    context_lens = [random.randint(1, MAX_SEQ_LEN) for _ in range(num_seqs)]
+    context_lens[-1] = MAX_SEQ_LEN
+    max_context_len = max(context_lens)
+    context_lens_tensor = torch.tensor(context_lens,
+                                       dtype=torch.int,
+                                       device="cuda")
+
+    max_num_blocks_per_seq = (max_context_len + block_size - 1) // block_size
+    block_tables = []
+    for _ in range(num_seqs):
+        block_table = [
+            random.randint(0, NUM_BLOCKS - 1)
+            for _ in range(max_num_blocks_per_seq)
+        ]
+        block_tables.append(block_table)
+    block_tables_tensor = torch.tensor(block_tables,
+                                       dtype=torch.int,
+                                       device="cuda")
+
+    # FP8 E4M3 caches are uint8-backed.
+    key_caches, value_caches = kv_cache_factory(NUM_BLOCKS, block_size, 1,
+                                                num_kv_heads, head_size,
+                                                torch.uint8, seed)
+    key_cache, value_cache = key_caches[0], value_caches[0]
+
+    output = torch.empty_like(query)
+    attention_ops.single_query_cached_kv_attention(
+        output,
+        query,
+        key_cache,
+        value_cache,
+        head_mapping,
+        scale,
+        block_tables_tensor,
+        context_lens_tensor,
+        block_size,
+        max_context_len,
+        None,
+    )
+
+    # The E4M3 decoding is exact and every decoded value is exactly
+    # representable in half/bfloat16/float, so the reference sees the same
+    # K/V values as the kernel and no extra tolerance is needed.
+    dequant_key_cache = fp8_dequantizer(key_cache).to(dtype)
+    dequant_value_cache = fp8_dequantizer(value_cache).to(dtype)
+
+    ref_output = torch.empty_like(query)
+    for i in range(num_seqs):
+        q = query[i].unsqueeze(0)
+        block_table = block_tables[i]
+        context_len = context_lens[i]
+
+        keys = []
+        values = []
+        for j in range(context_len):
+            block_number = block_table[j // block_size]
+            block_offset = j % block_size
+
+            k = dequant_key_cache[block_number, :, :, block_offset, :]
+            keys.append(k.reshape(num_kv_heads, head_size))
+
+            v = dequant_value_cache[block_number, :, :, block_offset]
+            values.append(v)
+        keys = torch.stack(keys, dim=0)
+        values = torch.stack(values, dim=0)
+        if num_queries_per_kv > 1:
+            keys = torch.repeat_interleave(keys, num_queries_per_kv, dim=1)
+            values = torch.repeat_interleave(values, num_queries_per_kv,
+                                             dim=1)
+
+        out = ref_masked_attention(q, keys, values, scale)
+        ref_output[i].copy_(out.view(num_query_heads, head_size))
+
+    # NOTE: Due to the kernel-level differences in the two implementations,
+    # there is a small numerical difference in the two outputs. Thus, we use
+    # a relaxed tolerance for the test.
+    assert torch.allclose(output, ref_output, atol=1e-3, rtol=1e-5)
+
+
 def ref_multi_query_kv_attention(
         cu_seq_lens: List[int],
         query: torch.Tensor,
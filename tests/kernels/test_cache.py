@@ -134,3 +134,132 @@ def test_reshape_and_cache(
     assert torch.allclose(value_cache, cloned_value_cache)
 
 
+@pytest.mark.parametrize("num_mappings", NUM_MAPPINGS)
+@pytest.mark.parametrize("num_layers", NUM_LAYERS)
+@pytest.mark.parametrize("num_heads", NUM_HEADS)
+@pytest.mark.parametrize("head_size", HEAD_SIZES)
+@pytest.mark.parametrize("block_size", BLOCK_SIZES)
+@pytest.mark.parametrize("num_blocks", NUM_BLOCKS)
+@pytest.mark.parametrize("seed", SEEDS)
+@torch.inference_mode()
+def test_copy_blocks_fp8(
+    kv_cache_factory,
+    num_mappings: int,
+    num_layers: int,
+    num_heads: int,
+    head_size: int,
+    block_size: int,
+    num_blocks: int,
+    seed: int,
+) -> None:
+    random.seed(seed)
+    torch.random.manual_seed(seed)
+    torch.cuda.manual_seed(seed)
+
+    assert 2 * num_mappings <= num_blocks
+    src_blocks = random.sample(range(num_blocks), num_mappings)
+    remaining_blocks = list(set(range(num_blocks)) - set(src_blocks))
+    dst_blocks = random.sample(remaining_blocks, 2 * num_mappings)
+    block_mapping = {}
+    for i in range(num_mappings):
+        src = src_blocks[i]
+        dst1 = dst_blocks[2 * i]
+        dst2 = dst_blocks[2 * i + 1]
+        block_mapping[src] = [dst1, dst2]
+
+    # FP8 E4M3 caches are uint8-backed.
+    key_caches, value_caches = kv_cache_factory(num_blocks, block_size,
+                                                num_layers, num_heads,
+                                                head_size, torch.uint8, seed)
+    cloned_key_caches = [key_cache.clone() for key_cache in key_caches]
+    cloned_value_caches = [
+        value_cache.clone() for value_cache in value_caches
+    ]
+
+    cache_ops.copy_blocks(key_caches, value_caches, block_mapping)
+
+    for src, dsts in block_mapping.items():
+        for dst in dsts:
+            for cloned_key_cache in cloned_key_caches:
+                cloned_key_cache[dst] = cloned_key_cache[src]
+            for cloned_value_cache in cloned_value_caches:
+                cloned_value_cache[dst] = cloned_value_cache[src]
+
+    # Copying is bytewise, so the FP8 caches must match exactly.
+    for key_cache, cloned_key_cache in zip(key_caches, cloned_key_caches):
+        assert torch.equal(key_cache, cloned_key_cache)
+    for value_cache, cloned_value_cache in zip(value_caches,
+                                               cloned_value_caches):
+        assert torch.equal(value_cache, cloned_value_cache)
+
+
+@pytest.mark.parametrize("num_tokens", NUM_TOKENS)
+@pytest.mark.parametrize("num_heads", NUM_HEADS)
+@pytest.mark.parametrize("head_size", HEAD_SIZES)
+@pytest.mark.parametrize("block_size", BLOCK_SIZES)
+@pytest.mark.parametrize("num_blocks", NUM_BLOCKS)
+@pytest.mark.parametrize("dtype", DTYPES)
+@pytest.mark.parametrize("seed", SEEDS)
+@torch.inference_mode()
+def test_reshape_and_cache_fp8(
+    kv_cache_factory,
+    fp8_dequantizer,
+    num_tokens: int,
+    num_heads: int,
+    head_size: int,
+    block_size: int,
+    num_blocks: int,
+    dtype: torch.dtype,
+    seed: int,
+) -> None:
+    random.seed(seed)
+    torch.random.manual_seed(seed)
+    torch.cuda.manual_seed(seed)
+
+    num_slots = block_size * num_blocks
+    slot_mapping = random.sample(range(num_slots), num_tokens)
+    slot_mapping_tensor = torch.tensor(slot_mapping,
+                                       dtype=torch.int,
+                                       device='cuda')
+
+    qkv = torch.randn(num_tokens,
+                      3,
+                      num_heads,
+                      head_size,
+                      dtype=dtype,
+                      device='cuda')
+    _, key, value = qkv.unbind(dim=1)
+
+    key_caches, value_caches = kv_cache_factory(num_blocks, block_size, 1,
+                                                num_heads, head_size,
+                                                torch.uint8, seed)
+    key_cache, value_cache = key_caches[0], value_caches[0]
+    cloned_key_cache = key_cache.clone()
+    cloned_value_cache = value_cache.clone()
+
+    cache_ops.reshape_and_cache(key, value, key_cache, value_cache,
+                                slot_mapping_tensor)
+
+    for i, slot in enumerate(slot_mapping):
+        block_idx = slot // block_size
+        block_offset = slot % block_size
+        dequant_key = fp8_dequantizer(
+            key_cache[block_idx, :, :, block_offset, :]).reshape(
+                num_heads, head_size)
+        dequant_value = fp8_dequantizer(value_cache[block_idx, :, :,
+                                                    block_offset])
+        # E4M3 carries three mantissa bits, so rounding to it loses at most
+        # 2^-4 of the magnitude (plus 2^-10 absolute in the subnormal range).
+        assert torch.allclose(dequant_key, key[i].float(),
+                              atol=2e-3, rtol=0.07)
+        assert torch.allclose(dequant_value, value[i].float(),
+                              atol=2e-3, rtol=0.07)
+        # Replay the written slots so the final comparison checks that the
+        # rest of the caches was left untouched.
+        cloned_key_cache[block_idx, :, :, block_offset, :] = (
+            key_cache[block_idx, :, :, block_offset, :])
+        cloned_value_cache[block_idx, :, :, block_offset] = (
+            value_cache[block_idx, :, :, block_offset])
+
+    assert torch.equal(key_cache, cloned_key_cache)
+    assert torch.equal(value_cache, cloned_value_cache)
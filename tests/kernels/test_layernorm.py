@@ -53,4 +53,77 @@ def test_rms_norm(
     )
     ref_out = ref(x)
     assert torch.allclose(out, ref_out, atol=1e-2, rtol=1e-5)
-    
\ No newline at end of file
+
+
+@pytest.mark.parametrize("num_tokens", NUM_TOKENS)
+@pytest.mark.parametrize("hidden_size", HIDDEN_SIZES)
+@pytest.mark.parametrize("dtype", DTYPES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_layer_norm(
+    num_tokens: int,
+    hidden_size: int,
+    dtype: torch.dtype,
+    seed: int,
+) -> None:
+    torch.random.manual_seed(seed)
+    torch.cuda.manual_seed(seed)
+
+    scale = float(hidden_size**-0.5)
+    x = torch.empty(num_tokens, hidden_size, dtype=dtype, device='cuda')
+    x.uniform_(-scale, scale)
+    ref = nn.LayerNorm(hidden_size, eps=1e-5).to(dtype).cuda()
+    ref.weight.data.normal_(mean=1.0, std=0.1)
+    ref.bias.data.normal_(mean=0.0, std=0.1)
+
+    out = torch.empty_like(x)
+    layernorm_ops.layer_norm(
+        out,
+        x,
+        ref.weight.data,
+        ref.bias.data,
+        ref.eps,
+    )
+    ref_out = ref(x)
+    assert torch.allclose(out, ref_out, atol=1e-2, rtol=1e-5)
+
+
+@pytest.mark.parametrize("num_tokens", NUM_TOKENS)
+@pytest.mark.parametrize("hidden_size", HIDDEN_SIZES)
+@pytest.mark.parametrize("has_y", [True, False])
+@pytest.mark.parametrize("dtype", DTYPES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_fused_add_layer_norm(
+    num_tokens: int,
+    hidden_size: int,
+    has_y: bool,
+    dtype: torch.dtype,
+    seed: int,
+) -> None:
+    torch.random.manual_seed(seed)
+    torch.cuda.manual_seed(seed)
+
+    scale = float(hidden_size**-0.5)
+    x = torch.empty(num_tokens, hidden_size, dtype=dtype, device='cuda')
+    x.uniform_(-scale, scale)
+    y = torch.empty_like(x).uniform_(-scale, scale) if has_y else None
+    residual = torch.empty_like(x).uniform_(-scale, scale)
+    ref = nn.LayerNorm(hidden_size, eps=1e-5).to(dtype).cuda()
+    ref.weight.data.normal_(mean=1.0, std=0.1)
+    ref.bias.data.normal_(mean=0.0, std=0.1)
+
+    out = torch.empty_like(x)
+    sum_out = torch.empty_like(x)
+    layernorm_ops.fused_add_layer_norm(
+        out,
+        sum_out,
+        x,
+        y,
+        residual,
+        ref.weight.data,
+        ref.bias.data,
+        ref.eps,
+    )
+    ref_sum = x + y + residual if has_y else x + residual
+    ref_out = ref(ref_sum)
+    assert torch.allclose(sum_out, ref_sum, atol=1e-2, rtol=1e-5)
+    assert torch.allclose(out, ref_out, atol=1e-2, rtol=1e-5)
@@ -1,3 +1,4 @@
+import random
 from typing import Optional, Tuple
 
 import pytest
@@ -165,5 +166,279 @@ def test_rotary_embedding(
     assert torch.allclose(out_key, ref_key, atol=1e-5, rtol=1e-5)
 
 
+@pytest.mark.parametrize("is_neox_style", IS_NEOX_STYLE)
+@pytest.mark.parametrize("num_heads", NUM_HEADS)
+@pytest.mark.parametrize("head_size", HEAD_SIZES)
+@pytest.mark.parametrize("rotary_dim", ROTARY_DIMS)
+@pytest.mark.parametrize("dtype", DTYPES)
+@pytest.mark.parametrize("seed", SEEDS)
+@torch.inference_mode()
+def test_rotary_embedding_packed_qkv(
+    is_neox_style: bool,
+    num_heads: int,
+    head_size: int,
+    rotary_dim: Optional[int],
+    dtype: torch.dtype,
+    seed: int,
+    num_tokens: int = 83,
+    max_position: int = 8192,
+    base: int = 10000,
+) -> None:
+    """Regression test for the prefill path of forward_packed.
+
+    The unfused rotary kernel derives the head count from the 2-D query
+    shape, so it must be given the flat strided views that forward_packed
+    slices out of the packed QKV projection output; this checks that those
+    views produce the same result as contiguous inputs.
+    """
+    if rotary_dim is None:
+        rotary_dim = head_size
+    torch.random.manual_seed(seed)
+    torch.cuda.manual_seed(seed)
+
+    positions = torch.randint(0, max_position, (num_tokens, ), device="cuda")
+    hidden_size = num_heads * head_size
+    qkv = torch.randn(num_tokens, 3 * hidden_size, dtype=dtype, device="cuda")
+    query = qkv[:, :hidden_size]
+    key = qkv[:, hidden_size:2 * hidden_size]
+
+    inv_freq = 1.0 / (base**(
+        torch.arange(0, rotary_dim, 2, dtype=torch.float) / rotary_dim))
+    t = torch.arange(max_position).float()
+    freqs = torch.einsum("i,j -> ij", t, inv_freq)
+    cos = freqs.cos()
+    sin = freqs.sin()
+    cos_sin_cache = torch.cat((cos, sin), dim=-1)
+    cos_sin_cache = cos_sin_cache.to(dtype=dtype, device='cuda')
+
+    # Compute the reference on contiguous copies of the views.
+    ref_query = query.clone()
+    ref_key = key.clone()
+    pos_encoding_ops.rotary_embedding(
+        positions,
+        ref_query,
+        ref_key,
+        head_size,
+        cos_sin_cache,
+        is_neox_style,
+    )
+
+    pos_encoding_ops.rotary_embedding(
+        positions,
+        query,
+        key,
+        head_size,
+        cos_sin_cache,
+        is_neox_style,
+    )
+
+    assert torch.allclose(query, ref_query, atol=1e-5, rtol=1e-5)
+    assert torch.allclose(key, ref_key, atol=1e-5, rtol=1e-5)
+
+
+@pytest.mark.parametrize("is_neox_style", IS_NEOX_STYLE)
+@pytest.mark.parametrize("num_heads", NUM_HEADS)
+@pytest.mark.parametrize("head_size", HEAD_SIZES)
+@pytest.mark.parametrize("rotary_dim", ROTARY_DIMS)
+@pytest.mark.parametrize("dtype", DTYPES)
+@pytest.mark.parametrize("seed", SEEDS)
+@torch.inference_mode()
+def test_rotary_embedding_and_cache(
+    kv_cache_factory,
+    is_neox_style: bool,
+    num_heads: int,
+    head_size: int,
+    rotary_dim: Optional[int],
+    dtype: torch.dtype,
+    seed: int,
+    num_tokens: int = 83,
+    block_size: int = 16,
+    num_blocks: int = 1024,
+    max_position: int = 8192,
+    base: int = 10000,
+) -> None:
+    from aphrodite import cache_ops
+
+    if rotary_dim is None:
+        rotary_dim = head_size
+    torch.random.manual_seed(seed)
+    torch.cuda.manual_seed(seed)
+
+    positions = torch.randint(0, max_position, (num_tokens, ), device="cuda")
+    qkv = torch.randn(num_tokens,
+                      3,
+                      num_heads,
+                      head_size,
+                      dtype=dtype,
+                      device="cuda")
+    query, key, value = qkv.unbind(dim=1)
+
+    inv_freq = 1.0 / (base**(
+        torch.arange(0, rotary_dim, 2, dtype=torch.float) / rotary_dim))
+    t = torch.arange(max_position).float()
+    freqs = torch.einsum("i,j -> ij", t, inv_freq)
+    cos = freqs.cos()
+    sin = freqs.sin()
+    cos_sin_cache = torch.cat((cos, sin), dim=-1)
+    cos_sin_cache = cos_sin_cache.to(dtype=dtype, device='cuda')
+
+    key_caches, value_caches = kv_cache_factory(num_blocks, block_size, 1,
+                                                num_heads, head_size, dtype,
+                                                seed)
+    key_cache, value_cache = key_caches[0], value_caches[0]
+    ref_key_cache = key_cache.clone()
+    ref_value_cache = value_cache.clone()
+
+    num_slots = block_size * num_blocks
+    slot_mapping = random.sample(range(num_slots), num_tokens)
+    slot_mapping = torch.tensor(slot_mapping, dtype=torch.int, device="cuda")
+
+    # Compute the reference with the unfused kernels.
+    ref_query = query.reshape(num_tokens, num_heads * head_size).clone()
+    ref_key = key.reshape(num_tokens, num_heads * head_size).clone()
+    pos_encoding_ops.rotary_embedding(
+        positions,
+        ref_query,
+        ref_key,
+        head_size,
+        cos_sin_cache,
+        is_neox_style,
+    )
+    cache_ops.reshape_and_cache(
+        ref_key.view(num_tokens, num_heads, head_size),
+        value.contiguous(),
+        ref_key_cache,
+        ref_value_cache,
+        slot_mapping,
+    )
+
+    pos_encoding_ops.rotary_embedding_and_cache(
+        positions,
+        query,
+        key,
+        value,
+        cos_sin_cache,
+        is_neox_style,
+        key_cache,
+        value_cache,
+        slot_mapping,
+    )
+
+    ref_query = ref_query.view(num_tokens, num_heads, head_size)
+    assert torch.allclose(query, ref_query, atol=1e-5, rtol=1e-5)
+    assert torch.allclose(key_cache, ref_key_cache, atol=1e-5, rtol=1e-5)
+    assert torch.allclose(value_cache, ref_value_cache, atol=1e-5, rtol=1e-5)
+
+
+@pytest.mark.parametrize("is_neox_style", IS_NEOX_STYLE)
+@pytest.mark.parametrize("num_heads", NUM_HEADS)
+@pytest.mark.parametrize("head_size", HEAD_SIZES)
+@pytest.mark.parametrize("rotary_dim", ROTARY_DIMS)
+@pytest.mark.parametrize("dtype", DTYPES)
+@pytest.mark.parametrize("seed", SEEDS)
+@torch.inference_mode()
+def test_rotary_embedding_and_cache_fp8(
+    kv_cache_factory,
+    fp8_dequantizer,
+    is_neox_style: bool,
+    num_heads: int,
+    head_size: int,
+    rotary_dim: Optional[int],
+    dtype: torch.dtype,
+    seed: int,
+    num_tokens: int = 83,
+    block_size: int = 16,
+    num_blocks: int = 1024,
+    max_position: int = 8192,
+    base: int = 10000,
+) -> None:
+    if rotary_dim is None:
+        rotary_dim = head_size
+    random.seed(seed)
+    torch.random.manual_seed(seed)
+    torch.cuda.manual_seed(seed)
+
+    positions = torch.randint(0, max_position, (num_tokens, ), device="cuda")
+    qkv = torch.randn(num_tokens,
+                      3,
+                      num_heads,
+                      head_size,
+                      dtype=dtype,
+                      device="cuda")
+    query, key, value = qkv.unbind(dim=1)
+
+    inv_freq = 1.0 / (base**(
+        torch.arange(0, rotary_dim, 2, dtype=torch.float) / rotary_dim))
+    t = torch.arange(max_position).float()
+    freqs = torch.einsum("i,j -> ij", t, inv_freq)
+    cos = freqs.cos()
+    sin = freqs.sin()
+    cos_sin_cache = torch.cat((cos, sin), dim=-1)
+    cos_sin_cache = cos_sin_cache.to(dtype=dtype, device='cuda')
+
+    # FP8 E4M3 caches are uint8-backed.
+    key_caches, value_caches = kv_cache_factory(num_blocks, block_size, 1,
+                                                num_heads, head_size,
+                                                torch.uint8, seed)
+    key_cache, value_cache = key_caches[0], value_caches[0]
+    cloned_key_cache = key_cache.clone()
+    cloned_value_cache = value_cache.clone()
+
+    num_slots = block_size * num_blocks
+    slot_mapping = random.sample(range(num_slots), num_tokens)
+    slot_mapping_tensor = torch.tensor(slot_mapping,
+                                       dtype=torch.int,
+                                       device="cuda")
+
+    # Compute the rotated key with the unfused rotary kernel.
+    ref_query = query.reshape(num_tokens, num_heads * head_size).clone()
+    ref_key = key.reshape(num_tokens, num_heads * head_size).clone()
+    pos_encoding_ops.rotary_embedding(
+        positions,
+        ref_query,
+        ref_key,
+        head_size,
+        cos_sin_cache,
+        is_neox_style,
+    )
+
+    pos_encoding_ops.rotary_embedding_and_cache(
+        positions,
+        query,
+        key,
+        value,
+        cos_sin_cache,
+        is_neox_style,
+        key_cache,
+        value_cache,
+        slot_mapping_tensor,
+    )
+
+    # The query is not cached, so it must match the unfused kernel exactly.
+    ref_query = ref_query.view(num_tokens, num_heads, head_size)
+    assert torch.allclose(query, ref_query, atol=1e-5, rtol=1e-5)
+
+    ref_key = ref_key.view(num_tokens, num_heads, head_size)
+    for i, slot in enumerate(slot_mapping):
+        block_idx = slot // block_size
+        block_offset = slot % block_size
+        dequant_key = fp8_dequantizer(
+            key_cache[block_idx, :, :, block_offset, :]).reshape(
+                num_heads, head_size)
+        dequant_value = fp8_dequantizer(value_cache[block_idx, :, :,
+                                                    block_offset])
+        # E4M3 carries three mantissa bits, so rounding to it loses at most
+        # 2^-4 of the magnitude (plus 2^-10 absolute in the subnormal range).
+        assert torch.allclose(dequant_key, ref_key[i].float(),
+                              atol=2e-3, rtol=0.07)
+        assert torch.allclose(dequant_value, value[i].float(),
+                              atol=2e-3, rtol=0.07)
+        # Replay the written slots so the final comparison checks that the
+        # rest of the caches was left untouched.
+        cloned_key_cache[block_idx, :, :, block_offset, :] = (
+            key_cache[block_idx, :, :, block_offset, :])
+        cloned_value_cache[block_idx, :, :, block_offset] = (
+            value_cache[block_idx, :, :, block_offset])
 
-        
\ No newline at end of file
+    assert torch.equal(key_cache, cloned_key_cache)
+    assert torch.equal(value_cache, cloned_value_cache)
@@ -0,0 +1,23 @@
+"""Smoke tests for the quantization config plumbing."""
+
+from aphrodite.modeling.loader import _MODEL_CLASSES_SUPPORT_QUANTIZATION
+from aphrodite.modeling.quantization_utils import (_QUANTIZATION_REGISTRY,
+                                                   get_quant_class)
+from aphrodite.modeling.quantization_utils.smoothquant import SmoothQuantConfig
+
+
+def test_quantization_methods_have_supported_models():
+    # A method present in the config registry but missing from the loader's
+    # support table makes get_model crash with a KeyError instead of a
+    # proper error message.
+    for method in _QUANTIZATION_REGISTRY:
+        assert _MODEL_CLASSES_SUPPORT_QUANTIZATION[method]
+
+
+def test_smoothquant_config_constructs():
+    quant_cls = get_quant_class("smoothquant")
+    assert quant_cls is SmoothQuantConfig
+    config = quant_cls.from_config({"w_bit": 8, "a_bit": 8})
+    assert config.weight_bits == 8
+    assert config.act_bits == 8
+    assert config.get_name() == "smoothquant"